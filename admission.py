@@ -0,0 +1,145 @@
+"""
+Admission control - per-upstream concurrency limits with a bounded wait queue,
+and a load-driven degradation ladder for turns
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+import metrics
+import resilience
+
+logger = logging.getLogger(__name__)
+
+# Requests in flight per upstream stage; more wait in a bounded queue
+UPSTREAM_LIMITS = {
+    "download": int(os.getenv("DOWNLOAD_CONCURRENCY", 32)),
+    "stt": int(os.getenv("STT_CONCURRENCY", 16)),
+    "llm": int(os.getenv("LLM_CONCURRENCY", 16)),
+    "tts": int(os.getenv("TTS_CONCURRENCY", 16)),
+}
+UPSTREAM_QUEUE_LIMIT = int(os.getenv("UPSTREAM_QUEUE_LIMIT", 64))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", 3))
+
+# Turns this worker can carry before it starts degrading them
+MAX_CONCURRENT_TURNS = int(os.getenv("MAX_CONCURRENT_TURNS", 48))
+
+# Degradation ladder, by load (the larger of turn occupancy and upstream queue occupancy)
+NORMAL, SAY_ONLY, CACHED_ONLY, SHED = 0, 1, 2, 3
+LEVEL_NAMES = {NORMAL: "normal", SAY_ONLY: "say_only", CACHED_ONLY: "cached_only", SHED: "shed"}
+DEGRADE_THRESHOLDS = (
+    (SHED, float(os.getenv("DEGRADE_SHED_AT", 1.0))),
+    (CACHED_ONLY, float(os.getenv("DEGRADE_CACHED_AT", 0.85))),
+    (SAY_ONLY, float(os.getenv("DEGRADE_SAY_AT", 0.6))),
+)
+
+
+class Overloaded(resilience.Unavailable):
+    """Too much load to serve this request normally"""
+    status = "overloaded"
+
+
+class UpstreamLimiter:
+    """Semaphore plus a bounded, time-limited wait queue for one upstream stage"""
+
+    def __init__(self, name, limit, max_waiting=UPSTREAM_QUEUE_LIMIT, max_wait_seconds=UPSTREAM_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            metrics.inc("voice_queue_rejections_total", upstream=self.name, reason="full")
+            raise Overloaded(f"{self.name} queue full")
+
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            # Never wait past the stage's share of the turn deadline
+            wait = min(self.max_wait_seconds, resilience.stage_timeout(self.name))
+            await asyncio.wait_for(self._semaphore.acquire(), wait)
+        except asyncio.TimeoutError:
+            metrics.inc("voice_queue_rejections_total", upstream=self.name, reason="timeout")
+            raise Overloaded(f"{self.name} queue wait over {wait:.1f}s") from None
+        finally:
+            self.waiting -= 1
+            metrics.observe("voice_queue_seconds", time.perf_counter() - started, upstream=self.name)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def occupancy(self):
+        """Queue fill fraction: 0 while there is no queue, 1 when it is full"""
+        return self.waiting / self.max_waiting if self.max_waiting else 0.0
+
+
+limiters = {stage: UpstreamLimiter(stage, limit) for stage, limit in UPSTREAM_LIMITS.items()}
+turns_in_flight = 0
+
+
+@asynccontextmanager
+async def slot(stage):
+    """
+    Wait for a concurrency slot on an upstream, then check its breaker and deadline
+
+    Yields:
+        aiohttp.ClientTimeout for the request
+    Raises:
+        Overloaded, CircuitOpen or DeadlineExceeded (all resilience.Unavailable)
+    """
+    async with limiters[stage].slot():
+        yield resilience.request_timeout(stage)
+
+
+@contextmanager
+def turn():
+    """Count a turn as in flight for the degradation ladder"""
+    global turns_in_flight
+    turns_in_flight += 1
+    try:
+        yield
+    finally:
+        turns_in_flight -= 1
+
+
+def load():
+    """Current load as a fraction of capacity"""
+    queue_load = max(limiter.occupancy() for limiter in limiters.values())
+    return max(turns_in_flight / MAX_CONCURRENT_TURNS, queue_load)
+
+
+def degradation_level():
+    """Degradation level for a new turn: NORMAL, SAY_ONLY, CACHED_ONLY or SHED"""
+    current = load()
+    for level, threshold in DEGRADE_THRESHOLDS:
+        if current >= threshold:
+            return level
+    return NORMAL
+
+
+def _collect():
+    gauges = {
+        "voice_turns_in_flight": turns_in_flight,
+        "voice_degradation_level": degradation_level(),
+    }
+    for name, limiter in limiters.items():
+        gauges[f"voice_{name}_in_flight"] = limiter.in_flight
+        gauges[f"voice_{name}_waiting"] = limiter.waiting
+    return gauges
+
+
+metrics.register_collector(_collect)
+metrics.describe("voice_queue_seconds", "Time spent waiting for an upstream concurrency slot")
+metrics.describe("voice_queue_rejections_total", "Upstream requests refused by admission control (queue full or wait too long)")
+metrics.describe("voice_degraded_turns_total", "Turns served below full quality, by degradation level")
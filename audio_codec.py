@@ -0,0 +1,139 @@
+"""
+Audio codec helpers - decode Twilio Media Streams payloads, parse WAV files and wrap PCM as WAV
+"""
+
+import base64
+import io
+import struct
+import wave
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_MULAW = 0x0007
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _build_mulaw_decode_table():
+    """G.711 μ-law byte → 16-bit linear PCM for all 256 codes"""
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(sign != 0, -magnitude, magnitude).astype(np.int16)
+
+
+MULAW_DECODE_TABLE = _build_mulaw_decode_table()
+
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32635
+
+
+def _build_mulaw_encode_table():
+    """G.711 μ-law byte for every 16-bit sample, indexed by the sample's bits as uint16"""
+    samples = np.arange(65536, dtype=np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), MULAW_CLIP) + MULAW_BIAS
+    # Segment = position of the highest set bit above bit 7
+    exponent = np.clip(np.floor(np.log2(magnitude)).astype(np.int32) - 7, 0, 7)
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+MULAW_ENCODE_TABLE = _build_mulaw_encode_table()
+
+
+def decode_mulaw(data):
+    """Decode μ-law bytes to int16 samples"""
+    return MULAW_DECODE_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def encode_mulaw(samples, out=None):
+    """Encode int16 samples to μ-law with one table lookup per sample (into out if given)"""
+    samples = np.ascontiguousarray(samples, dtype=np.int16)
+    return np.take(MULAW_ENCODE_TABLE, samples.view(np.uint16), out=out)
+
+
+def decode_l16(data):
+    """Decode L16 (big-endian, RFC 3551) bytes to native int16 samples"""
+    return np.frombuffer(data, dtype='>i2').astype(np.int16)
+
+
+def decode_media_payload(payload_b64, encoding):
+    """Decode a base64 Media Streams payload according to the stream's mediaFormat encoding"""
+    data = base64.b64decode(payload_b64)
+    if encoding == "audio/x-mulaw":
+        return decode_mulaw(data)
+    return decode_l16(data)
+
+
+def pcm_to_wav(samples, sample_rate):
+    """Wrap mono int16 samples in a WAV container"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+    return buffer.getvalue()
+
+
+def parse_wav(data):
+    """
+    Parse a RIFF/WAVE file into int16 samples
+
+    Handles 8/16/32-bit PCM, 32-bit float and μ-law, any channel count.
+
+    Returns:
+        tuple: (samples int16 array shaped (frames, channels), sample_rate)
+
+    Raises:
+        ValueError: if the data is not a WAV file this parser understands
+    """
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+
+    fmt = None
+    payload = None
+    offset = 12
+    try:
+        while offset + 8 <= len(data):
+            chunk_id, chunk_size = struct.unpack_from('<4sI', data, offset)
+            body_start = offset + 8
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack_from('<HHIIHH', data, body_start)
+                if fmt[0] == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                    # The real format tag is the first field of the SubFormat GUID
+                    fmt = (struct.unpack_from('<H', data, body_start + 24)[0],) + fmt[1:]
+            elif chunk_id == b'data':
+                # Streaming writers leave the size as 0 or 0xFFFFFFFF; take the rest of the file
+                end = body_start + chunk_size if 0 < chunk_size <= len(data) - body_start else len(data)
+                payload = memoryview(data)[body_start:end]
+                break
+            offset = body_start + chunk_size + (chunk_size & 1)
+    except struct.error as e:
+        raise ValueError(f"Truncated WAV header: {e}")
+
+    if fmt is None or payload is None:
+        raise ValueError("WAV file is missing fmt or data chunk")
+
+    format_tag, channels, sample_rate, _, block_align, bits = fmt
+    if channels < 1 or block_align < 1:
+        raise ValueError("Invalid WAV format chunk")
+    payload = payload[:len(payload) - len(payload) % block_align]
+
+    if format_tag == WAVE_FORMAT_MULAW:
+        samples = decode_mulaw(payload)
+    elif format_tag == WAVE_FORMAT_PCM and bits == 16:
+        samples = np.frombuffer(payload, dtype='<i2')
+    elif format_tag == WAVE_FORMAT_PCM and bits == 8:
+        samples = ((np.frombuffer(payload, dtype=np.uint8).astype(np.int16) - 128) << 8)
+    elif format_tag == WAVE_FORMAT_PCM and bits == 32:
+        samples = (np.frombuffer(payload, dtype='<i4') >> 16).astype(np.int16)
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+        samples = (np.clip(np.frombuffer(payload, dtype='<f4'), -1.0, 1.0) * 32767).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported WAV encoding (format {format_tag}, {bits} bits)")
+
+    return samples.reshape(-1, channels), sample_rate
@@ -0,0 +1,105 @@
+"""
+Audio preprocessing before STT
+Parses the recording, downmixes/resamples it, trims leading/trailing silence
+and drops clips with no speech so they never reach the upstream
+"""
+
+import os
+import logging
+import numpy as np
+from audio_codec import parse_wav, pcm_to_wav
+
+logger = logging.getLogger(__name__)
+
+AUDIO_PREPROCESS = os.getenv("AUDIO_PREPROCESS", "1") == "1"
+
+# Highest rate STT needs; recordings above it are downsampled, never upsampled
+STT_SAMPLE_RATE = int(os.getenv("STT_SAMPLE_RATE", 16000))
+
+FRAME_MS = 20
+# A frame is speech if it is within DYNAMIC_RANGE_DB of the loudest frame and above MIN_SPEECH_DB
+MIN_SPEECH_DB = float(os.getenv("PREPROCESS_MIN_SPEECH_DB", -45))
+DYNAMIC_RANGE_DB = float(os.getenv("PREPROCESS_DYNAMIC_RANGE_DB", 35))
+# Less total speech than this counts as an empty recording
+MIN_SPEECH_MS = int(os.getenv("PREPROCESS_MIN_SPEECH_MS", 200))
+# Audio kept around the detected speech so word edges are not clipped
+PADDING_MS = int(os.getenv("PREPROCESS_PADDING_MS", 200))
+
+
+def frame_energies_db(samples, frame_len):
+    """Per-frame RMS level in dBFS for mono int16 samples (trailing partial frame dropped)"""
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32)
+    rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_len) / 32768.0
+    return 20.0 * np.log10(rms + 1e-9)
+
+
+def downmix(samples):
+    """(frames, channels) int16 → mono int16"""
+    if samples.shape[1] == 1:
+        return samples[:, 0]
+    return samples.mean(axis=1).astype(np.int16)
+
+
+def resample(samples, source_rate, target_rate):
+    """Resample mono int16 audio by linear interpolation (with a box low-pass when downsampling)"""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    x = samples.astype(np.float32)
+    ratio = source_rate / target_rate
+    if ratio > 1:
+        # Moving average over one output period keeps aliasing down cheaply
+        width = int(np.ceil(ratio))
+        x = np.convolve(x, np.full(width, 1.0 / width, dtype=np.float32), mode='same')
+    n_out = int(len(x) / ratio)
+    positions = np.arange(n_out, dtype=np.float64) * ratio
+    return np.interp(positions, np.arange(len(x)), x).astype(np.int16)
+
+
+def trim_silence(samples, sample_rate):
+    """
+    Trim leading and trailing silence
+
+    Returns:
+        tuple: (trimmed samples, speech milliseconds detected)
+    """
+    frame_len = max(1, sample_rate * FRAME_MS // 1000)
+    energies = frame_energies_db(samples, frame_len)
+    if len(energies) == 0:
+        return samples[:0], 0
+    threshold = max(MIN_SPEECH_DB, float(energies.max()) - DYNAMIC_RANGE_DB)
+    speech = np.flatnonzero(energies >= threshold)
+    if len(speech) == 0:
+        return samples[:0], 0
+
+    pad = PADDING_MS // FRAME_MS
+    first = max(0, speech[0] - pad) * frame_len
+    last = min(len(energies), speech[-1] + 1 + pad) * frame_len
+    return samples[first:last], len(speech) * FRAME_MS
+
+
+def preprocess_audio(audio_data):
+    """
+    Prepare a recording for STT
+
+    Returns:
+        bytes: mono WAV at most STT_SAMPLE_RATE with silence trimmed, the
+        original bytes if the WAV can't be parsed, or None if there is no speech
+    """
+    try:
+        samples, sample_rate = parse_wav(audio_data)
+    except ValueError as e:
+        logger.debug("Preprocessing skipped: %s", e)
+        return audio_data
+
+    mono = downmix(samples)
+    trimmed, speech_ms = trim_silence(mono, sample_rate)
+    if speech_ms < MIN_SPEECH_MS:
+        return None
+
+    target_rate = min(sample_rate, STT_SAMPLE_RATE)
+    processed = pcm_to_wav(resample(trimmed, sample_rate, target_rate), target_rate)
+    logger.debug("Preprocessed audio: %s → %s bytes, %s ms speech", len(audio_data), len(processed), speech_ms)
+    return processed
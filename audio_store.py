@@ -0,0 +1,67 @@
+"""
+In-process audio store - holds synthesized replies briefly so TwiML can <Play> them
+Size-bounded, short TTL, keyed by unguessable ids
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+import metrics
+
+AUDIO_STORE_MAX_BYTES = int(os.getenv("AUDIO_STORE_MAX_BYTES", 64 * 1024 * 1024))
+AUDIO_STORE_TTL_SECONDS = float(os.getenv("AUDIO_STORE_TTL_SECONDS", 300))
+
+
+class AudioStore:
+    """Insertion-ordered store of (audio bytes, content type) that expires entries by age and size"""
+
+    def __init__(self, max_bytes=AUDIO_STORE_MAX_BYTES, ttl_seconds=AUDIO_STORE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+
+    def put(self, data, content_type="audio/wav"):
+        """Store audio and return its id"""
+        audio_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self._expire(time.monotonic())
+            self._entries[audio_id] = (time.monotonic() + self.ttl_seconds, data, content_type)
+            self.size_bytes += len(data)
+            # Oldest entries go first; the one just added always stays
+            while self.size_bytes > self.max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+        return audio_id
+
+    def get(self, audio_id):
+        """
+        Returns:
+            tuple: (audio_bytes, content_type), or None if unknown or expired
+        """
+        with self._lock:
+            entry = self._entries.get(audio_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(audio_id)
+                return None
+            return entry[1], entry[2]
+
+    def _expire(self, now):
+        # Entries are in insertion order with a fixed TTL, so expired ones are at the front
+        while self._entries:
+            audio_id, entry = next(iter(self._entries.items()))
+            if entry[0] >= now:
+                break
+            self._remove(audio_id)
+
+    def _remove(self, audio_id):
+        entry = self._entries.pop(audio_id)
+        self.size_bytes -= len(entry[1])
+
+
+audio_store = AudioStore()
+metrics.register_collector(lambda: {"voice_audio_store_bytes": audio_store.size_bytes})
@@ -0,0 +1,211 @@
+"""
+Cache snapshots - the warm caches (reply text and audio, caller languages) written to a local
+file every so often and mapped back at startup, so a restart or redeploy does not start cold
+
+File layout (little-endian):
+    header:  magic, format version, version key (hash of models, prompts, corrections and normalizer)
+    records: kind, key length, text length, audio length, wall-clock expiry, CRC-32, then the bytes
+A file written for other models or prompts is ignored; a record with a bad CRC ends the read,
+and replies that expired while the server was down are not restored.
+Restored audio stays in the memory-mapped file until a cache hit copies it out.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+import speech_text
+from caller_profiles import LANGUAGES, caller_profiles
+from corrections import corrections
+from response_cache import response_cache
+from voice_pipeline import TTS_MODEL, TTS_SPEAKER, build_chat_payload
+
+logger = logging.getLogger(__name__)
+
+CACHE_SNAPSHOT = os.getenv("CACHE_SNAPSHOT", "1") == "1"
+CACHE_SNAPSHOT_PATH = os.getenv(
+    "CACHE_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_snapshot.bin")
+)
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv("CACHE_SNAPSHOT_INTERVAL", 60))
+
+MAGIC = b"VPSNAP"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct('<6sH16s')
+# kind, key length, text length, audio length (NO_AUDIO for none), expiry (time.time()), CRC-32 of the bytes
+_RECORD = struct.Struct('<BIIIdI')
+_CALLER = struct.Struct('<qq')
+NO_AUDIO = 0xFFFFFFFF
+
+KIND_RESPONSE = 1
+KIND_CALLER = 2
+
+
+def _file_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def version_key():
+    """
+    Identity of everything cached replies depend on; any change invalidates the snapshot
+
+    The normalizer is identified by its source, so a deploy that changes how text
+    is spelled out for TTS does not keep serving audio made the old way.
+    """
+    source = json.dumps({
+        "format": FORMAT_VERSION,
+        "tts": [TTS_MODEL, TTS_SPEAKER],
+        "llm": [build_chat_payload("", language) for language in LANGUAGES],
+        "corrections": _file_digest(corrections.path),
+        "normalizer": _file_digest(speech_text.__file__),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(source.encode('utf-8')).digest()[:16]
+
+
+def write(path=CACHE_SNAPSHOT_PATH):
+    """
+    Write the current caches to path (atomically replaced)
+
+    Returns:
+        int: records written
+    """
+    count = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, version_key()))
+        for (language, transcript), expires_at, response_text, response_audio in response_cache.export():
+            key = f"{language}\0{transcript}".encode('utf-8')
+            text = response_text.encode('utf-8')
+            audio = response_audio or b''
+            crc = zlib.crc32(audio, zlib.crc32(text, zlib.crc32(key)))
+            audio_len = NO_AUDIO if response_audio is None else len(audio)
+            f.write(_RECORD.pack(KIND_RESPONSE, len(key), len(text), audio_len, expires_at, crc))
+            f.write(key)
+            f.write(text)
+            f.write(audio)
+            count += 1
+        for number, packed in caller_profiles.export():
+            key = _CALLER.pack(number, packed)
+            f.write(_RECORD.pack(KIND_CALLER, len(key), 0, 0, 0.0, zlib.crc32(key)))
+            f.write(key)
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def restore(path=CACHE_SNAPSHOT_PATH):
+    """
+    Map a snapshot and load it into the caches; audio is not copied until it is used
+
+    Returns:
+        tuple: (responses restored, callers restored)
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Missing or empty file
+        return 0, 0
+
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        return 0, 0
+    magic, file_format, key = _HEADER.unpack_from(view)
+    if magic != MAGIC or file_format != FORMAT_VERSION or key != version_key():
+        logger.info("Ignoring cache snapshot %s: written for other models, prompts or corrections", path)
+        return 0, 0
+
+    responses, callers = [], []
+    offset = _HEADER.size
+    while offset + _RECORD.size <= len(view):
+        kind, key_len, text_len, audio_len, expires_at, crc = _RECORD.unpack_from(view, offset)
+        start = offset + _RECORD.size
+        has_audio = audio_len != NO_AUDIO
+        end = start + key_len + text_len + (audio_len if has_audio else 0)
+        if end > len(view):
+            logger.warning("Cache snapshot %s is truncated; keeping %s records", path, len(responses) + len(callers))
+            break
+        key_bytes = view[start:start + key_len]
+        text_bytes = view[start + key_len:start + key_len + text_len]
+        audio = view[start + key_len + text_len:end]
+        if zlib.crc32(audio, zlib.crc32(text_bytes, zlib.crc32(key_bytes))) != crc:
+            logger.warning("Cache snapshot %s has a corrupt record; keeping %s records", path, len(responses) + len(callers))
+            break
+        if kind == KIND_RESPONSE:
+            language, _, transcript = bytes(key_bytes).decode('utf-8').partition('\0')
+            responses.append(((language, transcript), expires_at, str(text_bytes, 'utf-8'), audio if has_audio else None))
+        elif kind == KIND_CALLER:
+            callers.append(_CALLER.unpack(key_bytes))
+        offset = end
+
+    return response_cache.restore(responses), caller_profiles.restore(callers)
+
+
+class SnapshotWriter:
+    """Background thread that rewrites the snapshot when the caches have changed"""
+
+    def __init__(self, path=CACHE_SNAPSHOT_PATH, interval=CACHE_SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._written = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            # What was just restored does not need writing back
+            self._written = self._state()
+            self._thread = threading.Thread(target=self._run, name="cache-snapshot", daemon=True)
+            self._thread.start()
+
+    def flush(self):
+        """Write now if anything changed since the last snapshot"""
+        with self._lock:
+            state = self._state()
+            if state == self._written:
+                return
+            start = time.perf_counter()
+            try:
+                count = write(self.path)
+            except OSError as e:
+                logger.warning("Cache snapshot write failed: %r", e)
+                return
+            self._written = state
+        logger.debug("Cache snapshot: %s records in %.0f ms", count, (time.perf_counter() - start) * 1000)
+
+    def stop(self):
+        """Final write at shutdown (only if snapshots were started)"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    @staticmethod
+    def _state():
+        return response_cache.changes, caller_profiles.changes
+
+
+snapshot_writer = SnapshotWriter()
+
+
+def start():
+    """Startup hook: map the last snapshot back into the caches, then keep it up to date"""
+    if not CACHE_SNAPSHOT:
+        return
+    responses, callers = restore()
+    if responses or callers:
+        logger.info("Restored %s cached replies and %s caller profiles from %s", responses, callers, CACHE_SNAPSHOT_PATH)
+    snapshot_writer.start()
@@ -0,0 +1,137 @@
+"""
+Caller profiles - the last language each caller used, keyed by their phone number
+Lets repeat callers skip the language menu (and the media stream skip auto-detection)
+
+In memory: phone number as an int → packed (expiry, language index) int, LRU-bounded
+Optionally persisted write-through to a local SQLite file (CALLER_PROFILE_DB)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CALLER_PROFILES = os.getenv("CALLER_PROFILES", "1") == "1"
+CALLER_PROFILE_TTL_SECONDS = float(os.getenv("CALLER_PROFILE_TTL_DAYS", 90)) * 86400
+CALLER_PROFILE_MAX = int(os.getenv("CALLER_PROFILE_MAX", 100000))
+# Empty keeps profiles in memory only (lost on restart)
+CALLER_PROFILE_DB = os.getenv("CALLER_PROFILE_DB", "")
+
+# Index stored per caller; append only, the index is what gets persisted
+LANGUAGES = ('hi-IN', 'en-IN', 'te-IN')
+_LANGUAGE_BITS = 2
+
+_NON_DIGITS_RE = re.compile(r'\D')
+
+
+def caller_key(number):
+    """E.164 number → int key, or None for anonymous / unparseable callers"""
+    digits = _NON_DIGITS_RE.sub('', number or '')
+    return int(digits) if 6 <= len(digits) <= 15 else None
+
+
+class CallerProfiles:
+    """Phone number → last language, with TTL expiry and an optional SQLite copy"""
+
+    def __init__(self, path=CALLER_PROFILE_DB, ttl_seconds=CALLER_PROFILE_TTL_SECONDS, max_entries=CALLER_PROFILE_MAX):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # Bumped on every change, so a snapshot can tell whether anything changed
+        self.changes = 0
+        if path:
+            self._open(path)
+
+    def get(self, number):
+        """The caller's remembered language, or None"""
+        key = caller_key(number)
+        if key is None or not CALLER_PROFILES:
+            return None
+        with self._lock:
+            packed = self._entries.get(key)
+            if packed is not None and packed >> _LANGUAGE_BITS < time.time():
+                del self._entries[key]
+                packed = None
+            if packed is not None:
+                self._entries.move_to_end(key)
+        metrics.inc("voice_caller_profile_lookups_total", result="miss" if packed is None else "hit")
+        return None if packed is None else LANGUAGES[packed & ((1 << _LANGUAGE_BITS) - 1)]
+
+    def remember(self, number, language):
+        """Record the language a caller chose or was detected speaking; refreshes the TTL"""
+        key = caller_key(number)
+        if key is None or language not in LANGUAGES or not CALLER_PROFILES:
+            return
+        expires = int(time.time() + self.ttl_seconds)
+        packed = expires << _LANGUAGE_BITS | LANGUAGES.index(language)
+        with self._lock:
+            if self._entries.get(key) == packed:
+                return
+            self._entries[key] = packed
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.changes += 1
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO callers VALUES (?, ?)", (key, packed))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Caller profile write failed: %r", e)
+
+    def export(self):
+        """(number key, packed) pairs, least recently used first, for a snapshot"""
+        with self._lock:
+            return list(self._entries.items())
+
+    def restore(self, entries):
+        """Add (number key, packed) pairs from export() that are unknown and unexpired; returns how many"""
+        now = time.time()
+        restored = 0
+        with self._lock:
+            for key, packed in reversed(entries):
+                if key in self._entries or packed >> _LANGUAGE_BITS < now:
+                    continue
+                if len(self._entries) >= self.max_entries:
+                    break
+                self._entries[key] = packed
+                self._entries.move_to_end(key, last=False)
+                restored += 1
+        return restored
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _open(self, path):
+        try:
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            # WAL + NORMAL: a commit is an append to the log, not an fsync per caller
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS callers (number INTEGER PRIMARY KEY, packed INTEGER NOT NULL)")
+            now = int(time.time())
+            db.execute("DELETE FROM callers WHERE packed >> ? < ?", (_LANGUAGE_BITS, now))
+            rows = db.execute(
+                "SELECT number, packed FROM callers ORDER BY packed >> ? DESC LIMIT ?", (_LANGUAGE_BITS, self.max_entries)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Caller profiles stay in memory; cannot open %s: %r", path, e)
+            return
+        # Oldest first, so the LRU order roughly follows recency
+        for number, packed in reversed(rows):
+            self._entries[number] = packed
+        self._db = db
+        logger.info("Loaded %s caller profiles from %s", len(rows), path)
+
+
+caller_profiles = CallerProfiles()
+metrics.register_collector(lambda: {"voice_caller_profiles": len(caller_profiles)})
+metrics.describe("voice_caller_profile_lookups_total", "Caller language lookups by result (hit skips the menu)")
@@ -0,0 +1,100 @@
+"""
+Correction engine - transcript and pronunciation fixes loaded from corrections.json
+Each (stage, language) table is compiled once into a single-pass matcher and
+reloaded automatically when the data file changes
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CORRECTIONS_PATH = os.getenv(
+    "CORRECTIONS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "corrections.json")
+)
+# How often (at most) the data file's mtime is checked for hot reload
+RELOAD_CHECK_SECONDS = float(os.getenv("CORRECTIONS_RELOAD_SECONDS", 5))
+
+
+class CompiledTable:
+    """One alternation regex over all keys, longest first, so every position is rewritten at most once"""
+
+    def __init__(self, table):
+        self.table = table
+        if table:
+            keys = sorted(table, key=len, reverse=True)
+            self.pattern = re.compile('|'.join(re.escape(key) for key in keys))
+        else:
+            self.pattern = None
+
+    def apply(self, text):
+        if self.pattern is None or not text:
+            return text
+        return self.pattern.sub(lambda match: self.table[match.group(0)], text)
+
+
+class CorrectionEngine:
+    """
+    Per-stage, per-language correction tables
+
+    The data file maps stage ("stt", "tts") → language → {wrong: right}.
+    Every language inherits the stage's "default" table and overrides it.
+    """
+
+    def __init__(self, path=CORRECTIONS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {}
+        self._compiled = {}
+        self._mtime = None
+        self._next_check = 0.0
+        self.reload()
+
+    def reload(self):
+        """Load and validate the data file; keeps the previous tables if it is broken"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Could not load corrections from %s: %s", self.path, e)
+            return False
+
+        with self._lock:
+            self._data = data
+            self._compiled = {}
+            self._mtime = mtime
+        logger.debug("Loaded corrections from %s", self.path)
+        return True
+
+    def apply(self, stage, text, language):
+        """Apply a stage's corrections for a language in one pass"""
+        self._maybe_reload()
+        key = (stage, language)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            with self._lock:
+                stage_tables = self._data.get(stage, {})
+                table = dict(stage_tables.get("default", {}))
+                table.update(stage_tables.get(language, {}))
+                compiled = self._compiled[key] = CompiledTable(table)
+        return compiled.apply(text)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + RELOAD_CHECK_SECONDS
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+
+corrections = CorrectionEngine()
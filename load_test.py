@@ -0,0 +1,342 @@
+"""
+Load test - drives the Twilio webhook flow at N concurrent simulated calls against local mock upstreams
+Reports throughput, per-webhook tail latency and the server's own per-stage latency from /metrics
+
+Spawn a server wired to the mocks and run 200 calls, 50 at a time:
+    python load_test.py --calls 200 --concurrency 50
+Against a server you started yourself (with SARVAM_BASE_URL pointing at mock_upstreams.py):
+    python load_test.py --target http://127.0.0.1:5000 --mock-port 8930
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+import aiohttp
+import mock_upstreams
+
+# "reply" is /voice/process until the final reply TwiML, including any /voice/result polls
+STEPS = ("incoming", "language", "start", "process", "result", "reply", "audio", "continue")
+# Keypad digit for each language menu option
+LANGUAGE_DIGITS = {"hi-IN": "1", "en-IN": "2", "te-IN": "3"}
+
+_STAGE_RE = re.compile(r'^voice_stage_seconds\{(?P<labels>[^}]*)\} (?P<value>\S+)$')
+_LABEL_RE = re.compile(r'(\w+)="([^"]*)"')
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(q * len(ordered))) - 1)]
+
+
+class CallFailed(Exception):
+    pass
+
+
+class LoadTest:
+    """Simulated callers walking /voice/incoming → language → start → process → continue"""
+
+    def __init__(self, target, recording_base, calls, concurrency, turns=1, language="hi-IN", timeout=60):
+        self.target = target.rstrip('/')
+        self.recording_base = recording_base.rstrip('/')
+        self.calls = calls
+        self.concurrency = concurrency
+        self.turns = turns
+        self.language = language
+        self.timeout = timeout
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.replies = defaultdict(int)
+        self.completed = 0
+        self.failed = 0
+        self.turns_completed = 0
+        self.elapsed = 0.0
+
+    async def run(self):
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            queue = asyncio.Queue()
+            for call_number in range(self.calls):
+                queue.put_nowait(call_number)
+
+            async def caller():
+                while not queue.empty():
+                    await self._call(session, queue.get_nowait())
+
+            start = time.perf_counter()
+            await asyncio.gather(*(caller() for _ in range(min(self.concurrency, self.calls))))
+            self.elapsed = time.perf_counter() - start
+
+    async def _call(self, session, call_number):
+        call_sid = f"CA{call_number:032d}"
+        form = {"CallSid": call_sid, "From": f"+9190000{call_number:05d}", "To": "+15550000000"}
+        try:
+            twiml = await self._post(session, "incoming", "/voice/incoming", form)
+            action = _find(twiml, "Gather").get("action")
+            twiml = await self._post(session, "language", action, dict(form, Digits=LANGUAGE_DIGITS[self.language]))
+            twiml = await self._post(session, "start", _find(twiml, "Redirect").text, form)
+            record_action = _find(twiml, "Record").get("action")
+
+            for turn in range(self.turns):
+                recording_sid = f"RE{call_number:016d}{turn:016d}"
+                recording_url = f"{self.recording_base}/2010-04-01/Accounts/ACbench/Recordings/{recording_sid}"
+                reply_start = time.perf_counter()
+                twiml = await self._post(session, "process", record_action,
+                                         dict(form, RecordingSid=recording_sid, RecordingUrl=recording_url))
+                # Background turn mode: follow the redirects until the reply is ready
+                while (redirect := twiml.find("Redirect")) is not None and redirect.text.startswith("/voice/result/"):
+                    pause = twiml.find("Pause")
+                    if pause is not None:
+                        # Twilio plays the pause before following the redirect
+                        await asyncio.sleep(float(pause.get("length", 1)))
+                    twiml = await self._post(session, "result", redirect.text, form)
+                self.latencies["reply"].append(time.perf_counter() - reply_start)
+                gather = twiml.find("Gather")
+                if gather is None:
+                    raise CallFailed("process: no reply")
+                play = twiml.find("Play")
+                if play is not None:
+                    self.replies["play"] += 1
+                    await self._fetch_audio(session, play.text)
+                elif twiml.find("Say") is not None:
+                    self.replies["say"] += 1
+                else:
+                    # Only the menu prompt: the high-call-volume answer
+                    self.replies["busy"] += 1
+
+                last_turn = turn == self.turns - 1
+                twiml = await self._post(session, "continue", gather.get("action"),
+                                         dict(form, Digits="2" if last_turn else "1"))
+                if not last_turn:
+                    record_action = _find(twiml, "Record").get("action")
+                self.turns_completed += 1
+            self.completed += 1
+        except (CallFailed, aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError) as e:
+            self.failed += 1
+            self.failures[str(e) or type(e).__name__] += 1
+
+    async def _post(self, session, step, path, form):
+        start = time.perf_counter()
+        async with session.post(self.target + path, data=form) as response:
+            body = await response.read()
+        self.latencies[step].append(time.perf_counter() - start)
+        if response.status != 200:
+            raise CallFailed(f"{step}: HTTP {response.status}")
+        return ET.fromstring(body)
+
+    async def _fetch_audio(self, session, path):
+        # Twilio fetches <Play> URLs right after the TwiML arrives
+        start = time.perf_counter()
+        async with session.get(self.target + path) as response:
+            await response.read()
+        self.latencies["audio"].append(time.perf_counter() - start)
+        if response.status != 200:
+            raise CallFailed(f"audio: HTTP {response.status}")
+
+    def summary(self):
+        steps = {}
+        for step in STEPS:
+            values = self.latencies.get(step)
+            if values:
+                steps[step] = {
+                    "count": len(values),
+                    "p50": percentile(values, 0.5),
+                    "p95": percentile(values, 0.95),
+                    "p99": percentile(values, 0.99),
+                    "max": max(values),
+                }
+        return {
+            "calls": self.calls,
+            "concurrency": self.concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "failures": dict(self.failures),
+            "replies": dict(self.replies),
+            "elapsed_seconds": self.elapsed,
+            "calls_per_second": self.completed / self.elapsed if self.elapsed else 0.0,
+            "turns_per_second": self.turns_completed / self.elapsed if self.elapsed else 0.0,
+            "steps": steps,
+        }
+
+
+def _find(twiml, tag):
+    element = twiml.find(f".//{tag}")
+    if element is None:
+        raise CallFailed(f"missing <{tag}> in TwiML")
+    return element
+
+
+async def scrape_stages(target):
+    """Server-side voice_stage_seconds quantiles from /metrics: {stage: {quantile: seconds}}"""
+    stages = defaultdict(dict)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(target.rstrip('/') + "/metrics") as response:
+                text = await response.text()
+    except aiohttp.ClientError:
+        return {}
+    for line in text.splitlines():
+        match = _STAGE_RE.match(line)
+        if not match:
+            continue
+        labels = dict(_LABEL_RE.findall(match.group('labels')))
+        if 'quantile' not in labels:
+            continue
+        stage = labels['stage'] + (f"[{labels['language']}]" if 'language' in labels else "")
+        stages[stage][f"p{round(float(labels['quantile']) * 100)}"] = float(match.group('value'))
+    return dict(stages)
+
+
+async def wait_until_ready(target, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                async with session.get(target + "/metrics") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {target} did not come up within {timeout}s")
+
+
+def spawn_server(port, mock_url, server_mode, extra_env):
+    """Start twilio_integration.py in a subprocess, wired to the mock upstreams"""
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(port),
+        "SERVER_MODE": server_mode,
+        "SARVAM_BASE_URL": mock_url,
+        "TWILIO_API_BASE_URL": mock_url,
+        "SARVAM_API_KEY": env.get("SARVAM_API_KEY") or "bench",
+        "TWILIO_ACCOUNT_SID": "ACbench",
+        "TWILIO_AUTH_TOKEN": "bench",
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+        # Mock-synthesized prompts must not land in the real asset directory
+        "PROMPT_ASSET_DIR": os.path.join(tempfile.gettempdir(), "voice-load-test-prompts"),
+        # Every run starts cold, and mock replies never reach the real cache snapshot
+        "CACHE_SNAPSHOT": "0",
+    })
+    env.update(extra_env)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "twilio_integration.py")
+    return subprocess.Popen([sys.executable, script], env=env, stdout=subprocess.DEVNULL)
+
+
+def print_report(summary, stages, mock_stats):
+    print("=" * 60)
+    print("LOAD TEST RESULTS")
+    print("=" * 60)
+    print(f"Calls: {summary['completed']}/{summary['calls']} completed, {summary['failed']} failed "
+          f"(concurrency {summary['concurrency']})")
+    print(f"Elapsed: {summary['elapsed_seconds']:.2f}s  "
+          f"Throughput: {summary['calls_per_second']:.2f} calls/s, {summary['turns_per_second']:.2f} turns/s")
+    for reason, count in sorted(summary['failures'].items(), key=lambda item: -item[1]):
+        print(f"  {count} × {reason}")
+    print("Replies: " + ", ".join(f"{count} {kind}" for kind, count in sorted(summary['replies'].items())))
+
+    print("\nWebhook latency (client side, ms)")
+    print(f"  {'step':<12}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for step, row in summary['steps'].items():
+        print(f"  {step:<12}{row['count']:>7}" + "".join(f"{row[k] * 1000:>9.0f}" for k in ('p50', 'p95', 'p99', 'max')))
+
+    if stages:
+        print("\nPipeline stages (server /metrics, ms)")
+        print(f"  {'stage':<24}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for stage, row in sorted(stages.items()):
+            print(f"  {stage:<24}" + "".join(
+                f"{row[k] * 1000:>9.0f}" if not math.isnan(row.get(k, math.nan)) else f"{'-':>9}"
+                for k in ('p50', 'p95', 'p99')))
+
+    if mock_stats:
+        print("\nMock upstreams")
+        for endpoint, row in mock_stats.items():
+            print(f"  {endpoint:<12}{row['requests']:>7} requests{row['errors']:>7} injected errors")
+    print("=" * 60)
+
+
+async def main_async(args):
+    mocks = None
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    if not args.external_mocks:
+        mocks = mock_upstreams.from_arguments(args)
+        mock_url = await mocks.start(port=args.mock_port)
+
+    process = None
+    target = args.target
+    if target is None:
+        target = f"http://127.0.0.1:{args.server_port}"
+        extra_env = dict(item.split('=', 1) for item in args.server_env)
+        process = spawn_server(args.server_port, mock_url, args.server_mode, extra_env)
+
+    try:
+        await wait_until_ready(target, process)
+        test = LoadTest(target, mock_url, args.calls, args.concurrency, args.turns, args.language, args.timeout)
+        await test.run()
+        summary = test.summary()
+        summary["stages"] = await scrape_stages(target)
+        summary["mocks"] = mocks.stats() if mocks else {}
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(10)
+        if mocks is not None:
+            await mocks.stop()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100, help="total simulated calls (default 100)")
+    parser.add_argument("--concurrency", type=int, default=20, help="calls in flight at once (default 20)")
+    parser.add_argument("--turns", type=int, default=1, help="recordings per call (default 1)")
+    parser.add_argument("--language", choices=sorted(LANGUAGE_DIGITS), default="hi-IN")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds (default 60)")
+    parser.add_argument("--target", help="base URL of a running server; omit to spawn one")
+    parser.add_argument("--server-port", type=int, default=5099, help="port for the spawned server (default 5099)")
+    parser.add_argument("--server-mode", choices=("async", "flask"), default="async")
+    parser.add_argument("--server-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="extra environment for the spawned server (repeatable)")
+    parser.add_argument("--mock-port", type=int, default=8930, help="port for the mock upstreams (default 8930)")
+    parser.add_argument("--external-mocks", action="store_true",
+                        help="use mock_upstreams.py already running on --mock-port")
+    parser.add_argument("--json", dest="json_path", help="also write the results as JSON to this file")
+    parser.add_argument("--max-error-rate", type=float,
+                        help="exit non-zero if the failed-call fraction exceeds this")
+    parser.add_argument("--max-p95-ms", type=float,
+                        help="exit non-zero if /voice/process p95 latency exceeds this")
+    mock_upstreams.add_arguments(parser)
+    args = parser.parse_args()
+
+    summary = asyncio.run(main_async(args))
+    print_report(summary, summary["stages"], summary["mocks"])
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    failed = False
+    if args.max_error_rate is not None and summary["failed"] > args.max_error_rate * summary["calls"]:
+        print(f"FAIL: error rate above {args.max_error_rate:.1%}")
+        failed = True
+    process_p95 = summary["steps"].get("process", {}).get("p95")
+    if args.max_p95_ms is not None and (process_p95 is None or process_p95 * 1000 > args.max_p95_ms):
+        print(f"FAIL: /voice/process p95 above {args.max_p95_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
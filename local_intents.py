@@ -0,0 +1,305 @@
+"""
+Local intents - answers "no power in <area>" and "when will power come back in <area>"
+from local data, so the common outage turns skip the LLM
+
+A keyword matcher (Hindi, Telugu, English) spots the intent, a character trie over
+localities.json finds the Hyderabad area (spelling and transliteration variants),
+and outage_status.json supplies what is known about it. Both files are reloaded
+when they change. Anything less clear-cut goes to the LLM as before.
+
+outage_status.json (times are Hyderabad time unless they carry an offset):
+    {"areas": {"<area id>": {"status": "outage" | "maintenance",
+                             "updated_at": "2026-10-17T14:05", "restore_by": "18:30"}}}
+restore_by is optional: "HH:MM" on the day of updated_at (the next day if that is
+earlier), or a full ISO date-time. Areas not listed, and entries without updated_at
+or older than OUTAGE_STATUS_MAX_AGE_HOURS, go to the LLM: nothing current is known
+locally to answer with. A restore time is only spoken while it is later today.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import metrics
+import speech_text
+from response_cache import normalize_transcript
+
+logger = logging.getLogger(__name__)
+
+LOCAL_INTENTS = os.getenv("LOCAL_INTENTS", "1") == "1"
+# Longer transcripts usually say more than the outage; those go to the LLM
+LOCAL_INTENT_MAX_WORDS = int(os.getenv("LOCAL_INTENT_MAX_WORDS", 20))
+
+_DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCALITIES_PATH = os.getenv("LOCALITIES_PATH", os.path.join(_DATA_DIR, "localities.json"))
+OUTAGE_STATUS_PATH = os.getenv("OUTAGE_STATUS_PATH", os.path.join(_DATA_DIR, "outage_status.json"))
+# Status entries last updated longer ago than this are not trusted
+OUTAGE_STATUS_MAX_AGE_HOURS = float(os.getenv("OUTAGE_STATUS_MAX_AGE_HOURS", 12))
+# How often (at most) the data files' mtimes are checked for hot reload
+RELOAD_CHECK_SECONDS = float(os.getenv("LOCAL_INTENTS_RELOAD_SECONDS", 5))
+
+# Keywords per concept. Whole-token terms (including romanized Hindi / Telugu, which STT
+# produces for code-mixed speech), plus Telugu stems that take suffixes ("కరెంటు లేదు", "పోయింది")
+POWER_TERMS = (
+    "बिजली", "लाइट", "करंट", "करेंट", "बत्ती", "पावर",
+    "power", "electricity", "current", "light", "lights", "supply", "bijli", "karent",
+)
+POWER_STEMS = ("కరెంట", "విద్యుత", "లైట", "పవర")
+# "गई" / "gayi" alone would also match "आ गई" (it came back), so only "चली गई" counts
+OUTAGE_TERMS = (
+    "चली गई", "चली गयी", "चला गया", "गुल", "कट", "बंद",
+    "cut", "gone", "off", "outage", "out", "down", "failure", "not working", "not coming",
+    "chali gayi", "chali gai", "gul", "band", "ledu", "poyindi",
+)
+# Negations only mean an outage next to a power word ("no power", "बिजली नहीं है"),
+# not anywhere in the sentence ("I am not calling about power")
+NEGATIONS = {"नहीं", "नही", "no", "not", "isn", "nahi", "nahin"}
+NEGATION_WINDOW = 2
+OUTAGE_STEMS = ("లేదు", "పోయ", "కట", "ఆగిపోయ", "రావట్లేదు", "రాలేదు")
+# Questions only: "back", "restored" or "time" on their own are as likely to say the power is back
+WHEN_TERMS = ("कब", "कितने", "कितना", "when", "how long", "what time", "kab", "eppudu")
+WHEN_STEMS = ("ఎప్పుడ", "ఎంత", "ఎన్ని", "ఎప్పటిక")
+# The power is already back: thanks or a follow-up, not an outage report
+RESOLVED_TERMS = (
+    "आ गई", "आ गयी", "आ गया", "वापस आ गई", "aa gayi", "aa gai", "vachindi",
+    "came back", "is back", "power restored", "current restored", "has been restored", "got restored",
+)
+RESOLVED_STEMS = ("వచ్చింది", "వచ్చేసింది")
+# Anything about bills, meters or safety needs a real answer, not a status template
+OTHER_TERMS = (
+    "बिल", "मीटर", "भुगतान", "कनेक्शन", "आग", "तार", "चिंगारी", "झटका",
+    "bill", "bills", "meter", "payment", "pay", "connection", "fire", "spark", "sparks", "wire", "wires", "shock",
+)
+OTHER_STEMS = ("బిల్", "మీటర", "కనెక్షన", "మంట", "వైర", "షాక")
+
+# Telugu case endings that may follow an area name ("అమీర్‌పేట్‌లో")
+AREA_SUFFIXES = ("లో", "లోని", "కి", "కు", "నుండి", "నుంచి", "దగ్గర")
+
+TEMPLATES = {
+    "hi-IN": {
+        ("outage", True): "{area} में बिजली की खराबी की जानकारी हमें है। बिजली {time} तक वापस आने की उम्मीद है।",
+        ("outage", False): "{area} में बिजली की खराबी की जानकारी हमें है। हमारी टीम इसे ठीक करने पर काम कर रही है।",
+        ("maintenance", True): "{area} में रखरखाव का काम चल रहा है। बिजली {time} तक वापस आ जाएगी।",
+        ("maintenance", False): "{area} में रखरखाव का काम चल रहा है। काम पूरा होते ही बिजली वापस आ जाएगी।",
+    },
+    "en-IN": {
+        ("outage", True): "We are aware of a power outage in {area}. Power is expected back by {time}.",
+        ("outage", False): "We are aware of a power outage in {area}. Our team is working to fix it.",
+        ("maintenance", True): "Maintenance work is going on in {area}. Power will be back by {time}.",
+        ("maintenance", False): "Maintenance work is going on in {area}. Power will be back once the work is done.",
+    },
+    "te-IN": {
+        ("outage", True): "{area}లో విద్యుత్ అంతరాయం గురించి మాకు తెలుసు. {time} లోగా కరెంట్ తిరిగి వస్తుంది.",
+        ("outage", False): "{area}లో విద్యుత్ అంతరాయం గురించి మాకు తెలుసు. మా బృందం దాన్ని సరిచేస్తోంది.",
+        ("maintenance", True): "{area}లో మరమ్మతు పనులు జరుగుతున్నాయి. {time} లోగా కరెంట్ తిరిగి వస్తుంది.",
+        ("maintenance", False): "{area}లో మరమ్మతు పనులు జరుగుతున్నాయి. పని పూర్తి కాగానే కరెంట్ తిరిగి వస్తుంది.",
+    },
+}
+
+_TIME_RE = re.compile(r'^(\d{1,2}):(\d{2})$')
+# Outage status times are local to Hyderabad (the server itself may run on UTC)
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def normalize(text):
+    """Transcript normalization plus zero-width joiners dropped (Telugu spellings vary in them)"""
+    return normalize_transcript(text).replace('\u200c', '').replace('\u200d', '')
+
+
+def negated_power(text):
+    """A negation within NEGATION_WINDOW words of a power word"""
+    tokens = text.split()
+    for index, token in enumerate(tokens):
+        if token in NEGATIONS:
+            nearby = tokens[max(0, index - NEGATION_WINDOW):index + NEGATION_WINDOW + 1]
+            if any(POWER_RE.match(word) for word in nearby):
+                return True
+    return False
+
+
+def compile_terms(terms, stems=()):
+    """One regex for a concept: whole tokens, or stems that may carry a suffix"""
+    whole = '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    parts = [f'(?:{whole})(?!\\S)'] if terms else []
+    if stems:
+        parts.append('|'.join(re.escape(stem) for stem in sorted(stems, key=len, reverse=True)))
+    return re.compile(f'(?<!\\S)(?:{"|".join(parts)})')
+
+
+POWER_RE = compile_terms(POWER_TERMS, POWER_STEMS)
+OUTAGE_RE = compile_terms(OUTAGE_TERMS, OUTAGE_STEMS)
+WHEN_RE = compile_terms(WHEN_TERMS, WHEN_STEMS)
+RESOLVED_RE = compile_terms(RESOLVED_TERMS, RESOLVED_STEMS)
+OTHER_RE = compile_terms(OTHER_TERMS, OTHER_STEMS)
+
+
+class Gazetteer:
+    """
+    Character trie over area names with spaces removed
+
+    Matches start at a word and end at a word boundary (or before a Telugu case
+    ending), so "mehdi patnam", "mehdipatnam" and "మెహదీపట్నంలో" all find the same area.
+    """
+
+    def __init__(self, localities):
+        self.localities = localities
+        self._root = {}
+        for area_id, entry in localities.items():
+            for name in entry.get("names", []) + list(entry.get("display", {}).values()):
+                node = self._root
+                for char in normalize(name).replace(' ', ''):
+                    node = node.setdefault(char, {})
+                node[None] = area_id
+
+    def find(self, text):
+        """Area ids mentioned in normalized text, longest match at each word"""
+        tokens = text.split()
+        compact = ''.join(tokens)
+        # Offsets in compact where a token starts / ends
+        starts, ends = [], set()
+        offset = 0
+        for token in tokens:
+            starts.append(offset)
+            offset += len(token)
+            ends.add(offset)
+
+        found = []
+        position = 0
+        for start in starts:
+            if start < position:
+                continue
+            node, match = self._root, None
+            for index in range(start, len(compact)):
+                node = node.get(compact[index])
+                if node is None:
+                    break
+                end = index + 1
+                if None in node and (end in ends or compact.startswith(AREA_SUFFIXES, end)):
+                    match = (node[None], end)
+            if match:
+                found.append(match[0])
+                position = match[1]
+        return found
+
+    def display(self, area_id, language):
+        names = self.localities[area_id].get("display", {})
+        return names.get(language) or names.get("en-IN") or area_id
+
+
+class WatchedJson:
+    """A JSON data file, re-read when its mtime changes; keeps the last good version if it breaks"""
+
+    def __init__(self, path, build=lambda data: data):
+        self.path = path
+        self.build = build
+        self.value = build({})
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.get()
+
+    def get(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                self._next_check = now + RELOAD_CHECK_SECONDS
+                self._reload()
+        return self.value
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding='utf-8') as f:
+                self.value = self.build(json.load(f))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            logger.error("Could not load %s: %s", self.path, e)
+            return
+        self._mtime = mtime
+        logger.debug("Loaded %s", self.path)
+
+
+gazetteer = WatchedJson(LOCALITIES_PATH, Gazetteer)
+outage_status = WatchedJson(OUTAGE_STATUS_PATH)
+
+
+def parse_time(value):
+    """ISO date-time → aware datetime in IST (naive values are taken as IST), or None"""
+    try:
+        moment = datetime.fromisoformat(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return moment.astimezone(IST) if moment.tzinfo else moment.replace(tzinfo=IST)
+
+
+def restore_moment(restore_by, updated_at):
+    """restore_by as a datetime: "HH:MM" on the day of updated_at (next day if earlier), or full ISO"""
+    match = _TIME_RE.match(str(restore_by or '').strip())
+    if not match:
+        return parse_time(restore_by) if restore_by else None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    moment = updated_at.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return moment + timedelta(days=1) if moment < updated_at else moment
+
+
+def spoken_time(moment, language, now):
+    """The restore time in words with the part of the day, or None unless it is still ahead today"""
+    if moment is None or moment <= now or moment.date() != now.date():
+        return None
+    return speech_text.spoken_time(moment.hour, moment.minute, language, meridiem="A" if moment.hour < 12 else "P")
+
+
+def answer(transcript, language):
+    """
+    A templated reply for a clear outage question about one known area
+
+    Returns:
+        str, or None when the LLM should answer (no intent, no single area, no known status, or other topics)
+    """
+    if not LOCAL_INTENTS or language not in TEMPLATES or not transcript:
+        return None
+
+    text = normalize(transcript)
+    if len(text.split()) > LOCAL_INTENT_MAX_WORDS or OTHER_RE.search(text) or not POWER_RE.search(text):
+        metrics.inc("voice_local_intent_total", result="no_intent")
+        return None
+    if RESOLVED_RE.search(text) or not (OUTAGE_RE.search(text) or negated_power(text) or WHEN_RE.search(text)):
+        metrics.inc("voice_local_intent_total", result="no_intent")
+        return None
+
+    index = gazetteer.get()
+    areas = set(index.find(text))
+    if len(areas) != 1:
+        # No area (the LLM asks for it) or several (ambiguous)
+        metrics.inc("voice_local_intent_total", result="low_confidence")
+        return None
+    area_id = areas.pop()
+
+    status = outage_status.get().get("areas", {}).get(area_id) or {}
+    kind = status.get("status")
+    if kind not in ("outage", "maintenance"):
+        # No known outage there, so no status to report
+        metrics.inc("voice_local_intent_total", result="no_status")
+        return None
+    updated_at = parse_time(status.get("updated_at"))
+    now = datetime.now(IST)
+    if updated_at is None or now - updated_at > timedelta(hours=OUTAGE_STATUS_MAX_AGE_HOURS):
+        # An entry nobody has confirmed lately may describe an outage that is long over
+        metrics.inc("voice_local_intent_total", result="stale_status")
+        return None
+    # A restore time already passed is not repeated; the no-time template says work is ongoing
+    restore_time = spoken_time(restore_moment(status.get("restore_by"), updated_at), language, now)
+    template = TEMPLATES[language][(kind, restore_time is not None)]
+    metrics.inc("voice_local_intent_total", result="answered")
+    return template.format(area=index.display(area_id, language), time=restore_time)
+
+
+metrics.describe("voice_local_intent_total", "Turns by local intent result (answered skips the LLM)")
@@ -0,0 +1,153 @@
+"""
+Outbound audio for Twilio Media Streams
+Turns TTS WAVs into 8 kHz μ-law in 20 ms frames, and paces them to the stream in real time
+with a mark after each clip, so the server knows when Twilio has finished playing it
+"""
+
+import base64
+import collections
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from audio_codec import encode_mulaw, parse_wav
+from audio_preprocess import downmix, resample
+
+logger = logging.getLogger(__name__)
+
+# Bidirectional Media Streams only take 8 kHz μ-law
+STREAM_SAMPLE_RATE = 8000
+FRAME_MS = 20
+FRAME_BYTES = STREAM_SAMPLE_RATE * FRAME_MS // 1000
+MULAW_SILENCE = 0xFF
+
+# How far ahead of real time frames are sent, to ride out network jitter without
+# queueing seconds of audio in Twilio that a barge-in would have to clear
+MEDIA_PACER_LEAD_MS = float(os.getenv("MEDIA_PACER_LEAD_MS", 100))
+
+
+def encode_for_stream(wav_bytes):
+    """
+    TTS WAV → 8 kHz μ-law, padded with silence to whole 20 ms frames
+
+    Returns:
+        list of memoryview frames over one buffer (empty if the WAV cannot be parsed)
+    """
+    try:
+        samples, sample_rate = parse_wav(wav_bytes)
+    except ValueError as e:
+        logger.warning("Cannot encode reply audio: %s", e)
+        return []
+    samples = resample(downmix(samples), sample_rate, STREAM_SAMPLE_RATE)
+
+    n_frames = -(-len(samples) // FRAME_BYTES)
+    encoded = np.full(n_frames * FRAME_BYTES, MULAW_SILENCE, dtype=np.uint8)
+    encode_mulaw(samples, out=encoded[:len(samples)])
+    view = memoryview(encoded)
+    return [view[i:i + FRAME_BYTES] for i in range(0, len(encoded), FRAME_BYTES)]
+
+
+class MediaPacer:
+    """
+    Sends queued frames to one Media Stream at playback speed on its own thread
+
+    Each clip is followed by a mark; Twilio echoes the mark back once it has played
+    everything before it, so playing is true until the last mark comes back.
+    clear() drops the queue and tells Twilio to drop its buffer (barge-in).
+    """
+
+    def __init__(self, ws, stream_sid, lead_ms=MEDIA_PACER_LEAD_MS):
+        self.ws = ws
+        self.stream_sid = stream_sid
+        self.lead = lead_ms / 1000
+        self._queue = collections.deque()
+        self._pending_marks = set()
+        self._next_at = None
+        self._closed = False
+        self._marks_sent = 0
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="media-pacer", daemon=True)
+        self._thread.start()
+
+    @property
+    def playing(self):
+        """Audio queued here or sent but not yet played by Twilio"""
+        with self._changed:
+            return bool(self._queue or self._pending_marks)
+
+    def play(self, frames):
+        """Queue a clip's frames, followed by a mark; returns the mark name"""
+        with self._changed:
+            self._marks_sent += 1
+            name = f"clip-{self._marks_sent}"
+            self._queue.extend(("media", frame) for frame in frames)
+            self._queue.append(("mark", name))
+            self._pending_marks.add(name)
+            self._changed.notify()
+        return name
+
+    def on_mark(self, name):
+        """Twilio's echo of a mark: everything before it has been played"""
+        with self._changed:
+            self._pending_marks.discard(name)
+
+    def clear(self):
+        """
+        Stop playback: drop queued frames and Twilio's buffer
+
+        Returns:
+            bool: whether anything was playing
+        """
+        with self._changed:
+            playing = bool(self._queue or self._pending_marks)
+            self._queue.clear()
+            self._pending_marks.clear()
+            self._next_at = None
+            if playing:
+                self._send({"event": "clear"})
+            self._changed.notify()
+        return playing
+
+    def close(self):
+        with self._changed:
+            self._closed = True
+            self._queue.clear()
+            self._changed.notify()
+
+    def _run(self):
+        with self._changed:
+            while True:
+                while not self._queue and not self._closed:
+                    self._changed.wait()
+                if self._closed:
+                    return
+
+                kind, item = self._queue[0]
+                now = time.monotonic()
+                if kind == "media":
+                    if self._next_at is None or self._next_at < now:
+                        # Idle gap (or first frame): Twilio's buffer has run dry, restart the clock
+                        self._next_at = now
+                    delay = self._next_at - self.lead - now
+                    if delay > 0:
+                        # Wakes early on clear() or close()
+                        self._changed.wait(delay)
+                        continue
+                    self._next_at += FRAME_MS / 1000
+                    message = {"event": "media", "media": {"payload": base64.b64encode(item).decode("ascii")}}
+                else:
+                    message = {"event": "mark", "mark": {"name": item}}
+                self._queue.popleft()
+
+                # Sent under the lock so a clear() cannot slip in between frames
+                try:
+                    self._send(message)
+                except Exception as e:
+                    logger.warning("Media stream send failed: %r", e)
+                    self._closed = True
+
+    def _send(self, message):
+        message["streamSid"] = self.stream_sid
+        self.ws.send(json.dumps(message))
@@ -0,0 +1,163 @@
+"""
+Metrics - per-stage latency histograms, upstream counters and payload sizes
+Rendered in Prometheus text format for the /metrics route
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Latency quantiles are computed over the most recent samples of each series
+WINDOW_SIZE = int(os.getenv("METRICS_WINDOW_SIZE", 2048))
+QUANTILES = (0.5, 0.95, 0.99)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_gauges = {}
+_collectors = []
+_help = {}
+
+
+class Histogram:
+    """Sliding-window summary: exact count/sum plus recent samples for quantiles"""
+
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW_SIZE)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(math.ceil(q * len(ordered))) - 1)]
+
+
+def describe(name, help_text):
+    """Attach a HELP line to a metric name"""
+    _help[name] = help_text
+
+
+def observe(name, value, **labels):
+    """Record one sample in a histogram series"""
+    key = _series_key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+
+def inc(name, amount=1, **labels):
+    """Increment a counter series"""
+    key = _series_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    """Set a gauge series"""
+    with _lock:
+        _gauges.setdefault(name, {})[_series_key(labels)] = value
+
+
+def register_collector(collect):
+    """Register a callable returning {gauge_name: value}, evaluated at render time"""
+    _collectors.append(collect)
+
+
+def quantile(name, q, min_samples=1, **labels):
+    """Current quantile of a histogram series, or None if it has fewer than min_samples samples"""
+    with _lock:
+        histogram = _histograms.get(name, {}).get(_series_key(labels))
+        if histogram is None or len(histogram.samples) < min_samples:
+            return None
+        return histogram.quantile(q)
+
+
+@contextmanager
+def timer(name, **labels):
+    """Time a block (sync or across awaits) into a histogram in seconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def stage_timer(stage, **labels):
+    """Time one pipeline stage into voice_stage_seconds"""
+    return timer("voice_stage_seconds", stage=stage, **labels)
+
+
+def render_prometheus():
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        for name, series in sorted(_histograms.items()):
+            _header(lines, name, "summary")
+            for key, histogram in sorted(series.items()):
+                for q in QUANTILES:
+                    value = histogram.quantile(q)
+                    lines.append(f"{name}{_format_labels(key + (('quantile', str(q)),))} {_format_value(value)}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        for name, series in sorted(_counters.items()):
+            _header(lines, name, "counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        gauges = {name: dict(series) for name, series in _gauges.items()}
+
+    for collect in _collectors:
+        for name, value in collect().items():
+            gauges.setdefault(name, {})[()] = value
+    for name, series in sorted(gauges.items()):
+        _header(lines, name, "gauge")
+        for key, value in sorted(series.items()):
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _series_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _header(lines, name, metric_type):
+    if name in _help:
+        lines.append(f"# HELP {name} {_help[name]}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+describe("voice_stage_seconds", "Latency of each pipeline stage (download, stt, llm, tts, turn)")
+describe("voice_upstream_responses_total", "Upstream responses by endpoint and HTTP status")
+describe("voice_payload_bytes", "Payload sizes sent to / received from upstreams")
@@ -0,0 +1,256 @@
+"""
+Mock upstreams for load testing - local stand-ins for the Sarvam APIs and the Twilio recording host
+Each endpoint has a configurable latency distribution and error rate
+
+Run standalone:
+    python mock_upstreams.py --port 8930 --stt-latency 300:900 --llm-latency 600:1500 --tts-error-rate 0.02
+Then point the server at it with SARVAM_BASE_URL=http://127.0.0.1:8930
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import math
+import random
+from collections import Counter
+import numpy as np
+from aiohttp import web
+from audio_codec import pcm_to_wav
+
+# Reply the mock LLM streams back, sentence by sentence
+LLM_REPLY = "आपकी शिकायत दर्ज कर ली गई है। बिजली दो घंटे में बहाल हो जाएगी। धन्यवाद।"
+
+# Transcripts that repeat across callers (response cache hits)
+COMMON_TRANSCRIPTS = [
+    "light nahi hai",
+    "बिजली कब आएगी",
+    "power cut in my area",
+    "मीटर खराब है",
+]
+
+RECORDING_SAMPLE_RATE = 8000
+TTS_SAMPLE_RATE = 8000
+# Mock TTS audio length per input character
+TTS_SECONDS_PER_CHAR = 0.06
+
+
+class LatencyProfile:
+    """
+    Log-normal latency given its median and p95 in milliseconds, plus an error rate
+
+    A spec of "300:900" means median 300 ms, p95 900 ms; "300" is a fixed 300 ms.
+    """
+
+    def __init__(self, spec="0", error_rate=0.0):
+        median, _, p95 = str(spec).partition(':')
+        self.median = float(median) / 1000
+        self.p95 = float(p95) / 1000 if p95 else self.median
+        if self.p95 < self.median:
+            raise ValueError(f"p95 below median in latency spec {spec!r}")
+        self.sigma = math.log(self.p95 / self.median) / 1.645 if self.median > 0 else 0.0
+        self.error_rate = error_rate
+
+    def sample(self):
+        if self.median <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median), self.sigma)
+
+    def should_fail(self):
+        return random.random() < self.error_rate
+
+    def __repr__(self):
+        return f"LatencyProfile(median={self.median * 1000:.0f}ms, p95={self.p95 * 1000:.0f}ms, errors={self.error_rate:.1%})"
+
+
+class MockUpstreams:
+    """aiohttp app serving /speech-to-text, /v1/chat/completions, /text-to-speech and Twilio recordings"""
+
+    def __init__(self, stt=None, llm=None, tts=None, recording=None,
+                 llm_token_ms=30, cache_hit_ratio=0.0, recording_seconds=3.0, recording_not_ready=0):
+        self.profiles = {
+            "stt": stt or LatencyProfile(),
+            "llm": llm or LatencyProfile(),
+            "tts": tts or LatencyProfile(),
+            "recording": recording or LatencyProfile(),
+        }
+        self.llm_token_seconds = llm_token_ms / 1000
+        self.cache_hit_ratio = cache_hit_ratio
+        self.requests = Counter()
+        self.errors = Counter()
+        self._unique = itertools.count(1)
+        self._recording = make_recording(recording_seconds)
+        # Twilio answers 404 for a moment until a recording is finalized
+        self.recording_not_ready = recording_not_ready
+        self._recording_attempts = Counter()
+        self._runner = None
+
+    def make_app(self):
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_post('/speech-to-text', self.speech_to_text)
+        app.router.add_post('/v1/chat/completions', self.chat_completions)
+        app.router.add_post('/text-to-speech', self.text_to_speech)
+        app.router.add_get('/2010-04-01/Accounts/{account}/Recordings/{recording}', self.recording)
+        # Connection warm-up HEADs
+        app.router.add_route('HEAD', '/', self.root)
+        return app
+
+    async def start(self, host='127.0.0.1', port=8930):
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay(self, endpoint):
+        """Count the request, sleep for a sampled latency and return an error response if one is due"""
+        self.requests[endpoint] += 1
+        profile = self.profiles[endpoint]
+        await asyncio.sleep(profile.sample())
+        if profile.should_fail():
+            self.errors[endpoint] += 1
+            return web.json_response({"error": {"message": "injected failure"}}, status=503)
+        return None
+
+    async def root(self, request):
+        return web.Response()
+
+    async def speech_to_text(self, request):
+        form = await request.post()
+        failure = await self._delay("stt")
+        if failure is not None:
+            return failure
+        if random.random() < self.cache_hit_ratio:
+            transcript = random.choice(COMMON_TRANSCRIPTS)
+        else:
+            # A unique complaint per turn, so the response cache cannot short-circuit it
+            transcript = f"{random.choice(COMMON_TRANSCRIPTS)} connection number {next(self._unique)}"
+        return web.json_response({"transcript": transcript, "language_code": form.get("language_code")})
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        failure = await self._delay("llm")
+        if failure is not None:
+            return failure
+
+        # One word per token; max_tokens cuts the reply like the real API does
+        tokens = LLM_REPLY.split(' ')
+        max_tokens = body.get("max_tokens") or len(tokens)
+        finish_reason = "length" if max_tokens < len(tokens) else "stop"
+        tokens = tokens[:max_tokens]
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": ' '.join(tokens)}
+            return web.json_response({"choices": [{"message": message, "finish_reason": finish_reason}]})
+
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        try:
+            for token in tokens:
+                chunk = {"choices": [{"delta": {"content": token + ' '}, "finish_reason": None}]}
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                await asyncio.sleep(self.llm_token_seconds)
+            chunk = {"choices": [{"delta": {}, "finish_reason": finish_reason}]}
+            await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            # The caller cancelled the stream (e.g. barge-in)
+            self.requests["llm_cancelled"] += 1
+        return response
+
+    async def text_to_speech(self, request):
+        body = await request.json()
+        failure = await self._delay("tts")
+        if failure is not None:
+            return failure
+        audios = [base64.b64encode(make_tts_audio(text)).decode('ascii') for text in body.get("inputs", [])]
+        return web.json_response({"request_id": "mock", "audios": audios})
+
+    async def recording(self, request):
+        failure = await self._delay("recording")
+        if failure is not None:
+            return failure
+        name = request.match_info['recording']
+        self._recording_attempts[name] += 1
+        if self._recording_attempts[name] <= self.recording_not_ready:
+            self.errors["recording"] += 1
+            return web.json_response({"message": "The requested resource was not found"}, status=404)
+        return web.Response(body=self._recording, content_type='audio/x-wav')
+
+    def stats(self):
+        return {endpoint: {"requests": self.requests[endpoint], "errors": self.errors[endpoint]}
+                for endpoint in self.profiles}
+
+
+def make_recording(seconds):
+    """A caller recording: a short lead-in of line noise, a voiced burst, then trailing silence"""
+    rate = RECORDING_SAMPLE_RATE
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 30, int(seconds * rate))
+    t = np.arange(int(seconds * 0.6 * rate)) / rate
+    voiced = 6000 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    start = int(seconds * 0.15 * rate)
+    samples[start:start + len(voiced)] += voiced
+    return pcm_to_wav(np.clip(samples, -32768, 32767).astype(np.int16), rate)
+
+
+_TTS_TONE = (3000 * np.sin(2 * np.pi * 220 * np.arange(TTS_SAMPLE_RATE * 30) / TTS_SAMPLE_RATE)).astype(np.int16)
+
+
+def make_tts_audio(text):
+    """WAV whose length tracks the text, like real synthesized speech"""
+    frames = min(len(_TTS_TONE), max(1, int(len(text) * TTS_SECONDS_PER_CHAR * TTS_SAMPLE_RATE)))
+    return pcm_to_wav(_TTS_TONE[:frames], TTS_SAMPLE_RATE)
+
+
+def add_arguments(parser):
+    """Mock upstream options, shared with load_test.py"""
+    group = parser.add_argument_group("mock upstreams")
+    for endpoint, default in (("stt", "300:800"), ("llm", "700:1800"), ("tts", "250:700"), ("recording", "80:250")):
+        group.add_argument(f"--{endpoint}-latency", default=default,
+                           help=f"{endpoint} latency as MEDIAN_MS[:P95_MS] (default {default})")
+        group.add_argument(f"--{endpoint}-error-rate", type=float, default=0.0,
+                           help=f"fraction of {endpoint} requests answered with 503 (default 0)")
+    group.add_argument("--llm-token-ms", type=float, default=30, help="gap between streamed LLM tokens (default 30)")
+    group.add_argument("--cache-hit-ratio", type=float, default=0.0,
+                       help="fraction of transcripts drawn from a small repeated set (default 0)")
+    group.add_argument("--recording-seconds", type=float, default=3.0, help="length of the fake recording (default 3)")
+    group.add_argument("--recording-not-ready", type=int, default=0,
+                       help="404s per recording before it becomes available (default 0)")
+    return group
+
+
+def from_arguments(args):
+    return MockUpstreams(
+        stt=LatencyProfile(args.stt_latency, args.stt_error_rate),
+        llm=LatencyProfile(args.llm_latency, args.llm_error_rate),
+        tts=LatencyProfile(args.tts_latency, args.tts_error_rate),
+        recording=LatencyProfile(args.recording_latency, args.recording_error_rate),
+        llm_token_ms=args.llm_token_ms,
+        cache_hit_ratio=args.cache_hit_ratio,
+        recording_seconds=args.recording_seconds,
+        recording_not_ready=args.recording_not_ready,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8930)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    mocks = from_arguments(args)
+    print(f"Mock upstreams on http://{args.host}:{args.port}")
+    for endpoint, profile in mocks.profiles.items():
+        print(f"  {endpoint}: {profile}")
+    web.run_app(mocks.make_app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
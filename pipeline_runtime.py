@@ -0,0 +1,143 @@
+"""
+Pipeline runtime - one long-lived event loop and pooled HTTP sessions per worker
+Keeps keep-alive connections to Sarvam and Twilio warm across turns
+"""
+
+import asyncio
+import logging
+import atexit
+import os
+import threading
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Base URL per upstream; each gets its own pooled connector
+UPSTREAMS = {
+    "sarvam": os.getenv("SARVAM_BASE_URL", "https://api.sarvam.ai"),
+    "twilio": os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com"),
+}
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", 75))
+DNS_TTL_SECONDS = int(os.getenv("HTTP_DNS_TTL_SECONDS", 600))
+
+_loop = None
+_thread = None
+_sessions = {}
+_lock = threading.Lock()
+
+
+def configure_logging():
+    """Leveled logging for the worker; LOG_LEVEL=DEBUG brings back the per-request detail"""
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+
+def start(warm=True):
+    """Start the background event loop (idempotent) and optionally warm connections"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_run_loop, args=(_loop,), name="pipeline-runtime", daemon=True)
+            _thread.start()
+            atexit.register(shutdown)
+    if warm:
+        asyncio.run_coroutine_threadsafe(warm_up(), _loop)
+    return _loop
+
+
+def attach(loop=None):
+    """Adopt an already running loop (async server mode) instead of a background thread"""
+    global _loop
+    with _lock:
+        _loop = loop or asyncio.get_running_loop()
+    return _loop
+
+
+def get_loop():
+    """Return the runtime loop, starting it if needed"""
+    return _loop or start(warm=False)
+
+
+def run(coro, timeout=None):
+    """Run a coroutine on the runtime loop from synchronous code and wait for it"""
+    return submit(coro).result(timeout)
+
+
+def submit(coro):
+    """Schedule a coroutine on the runtime loop; returns a concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def get_session(upstream):
+    """
+    Get the pooled session for an upstream ("sarvam" or "twilio")
+
+    Must be called from a coroutine running on the runtime loop.
+    """
+    global _loop
+    loop = asyncio.get_running_loop()
+    if _loop is None:
+        # Plain asyncio.run() callers: adopt their loop
+        attach(loop)
+    elif loop is not _loop:
+        raise RuntimeError("Pipeline coroutines must run on the runtime loop; use pipeline_runtime.run()")
+
+    session = _sessions.get(upstream)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_SIZE,
+            limit_per_host=POOL_SIZE,
+            ttl_dns_cache=DNS_TTL_SECONDS,
+            keepalive_timeout=KEEPALIVE_SECONDS,
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[upstream] = session
+    return session
+
+
+async def warm_up():
+    """Open a keep-alive connection to every upstream (resolves DNS and does the TLS handshake)"""
+    async def _touch(upstream, url):
+        try:
+            async with get_session(upstream).head(url, allow_redirects=False) as response:
+                await response.release()
+            logger.info("Warmed %s (%s)", upstream, response.status)
+        except Exception as e:
+            logger.warning("Warm-up failed for %s: %s", upstream, e)
+
+    await asyncio.gather(*(_touch(name, url) for name, url in UPSTREAMS.items()))
+
+
+async def close():
+    """Close all pooled sessions"""
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session in sessions:
+        await session.close()
+
+
+def shutdown():
+    """Close sessions and stop the background loop"""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop, _thread = None, None
+    if loop is None or thread is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close(), loop).result(5)
+    except Exception as e:
+        logger.warning("Error closing sessions: %s", e)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+    loop.close()
@@ -0,0 +1,253 @@
+"""
+Prompt assets - the fixed IVR prompts, synthesized once per language with the Sarvam voice
+Stored as content-hashed WAV files and served with immutable caching so TwiML can <Play> them
+
+Build (or refresh) the assets:
+    python prompt_assets.py [--force]
+The servers also build missing assets in the background at startup.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import pipeline_runtime
+from voice_pipeline import TTS_MODEL, TTS_SPEAKER, apply_tts_corrections, text_to_speech
+
+logger = logging.getLogger(__name__)
+
+PROMPT_ASSETS = os.getenv("PROMPT_ASSETS", "1") == "1"
+PROMPT_ASSET_DIR = os.getenv(
+    "PROMPT_ASSET_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_assets")
+)
+MANIFEST_NAME = "manifest.json"
+
+# Fixed prompts: prompt id → language → text
+PROMPTS = {
+    "welcome": {
+        "en-IN": "Welcome to electricity department.",
+    },
+    "menu_hindi": {
+        "en-IN": "Press 1 for Hindi.",
+        "hi-IN": "हिंदी के लिए 1 दबाएं।",
+    },
+    "menu_english": {
+        "en-IN": "Press 2 for English.",
+        "hi-IN": "अंग्रेजी के लिए 2 दबाएं।",
+    },
+    "menu_telugu": {
+        "en-IN": "Press 3 for Telugu.",
+        "te-IN": "తెలుగు కోసం 3 నొక్కండి.",
+    },
+    "greeting": {
+        "hi-IN": "नमस्ते, बिजली विभाग में आपका स्वागत है। कृपया अपनी समस्या बताएं।",
+        "en-IN": "Hello, welcome to electricity department. Please tell us your issue.",
+        "te-IN": "నమస్కారం, విద్యుత్ విభాగానికి స్వాగతం. దయచేసి మీ సమస్యను చెప్పండి.",
+    },
+    "change_language": {
+        "hi-IN": "भाषा बदलने के लिए 9 दबाएं।",
+        "en-IN": "Press 9 to change the language.",
+        "te-IN": "భాష మార్చడానికి 9 నొక్కండి.",
+    },
+    "more_help": {
+        "hi-IN": "क्या आपको और मदद चाहिए? हाँ के लिए 1 दबाएं, नहीं के लिए 2 दबाएं।",
+        "en-IN": "Do you need more help? Press 1 for yes, 2 for no.",
+        "te-IN": "మీకు మరింత సహాయం కావాలా? అవును కోసం 1, కాదు కోసం 2 నొక్కండి.",
+    },
+    "tell_issue": {
+        "hi-IN": "कृपया अपनी समस्या बताएं।",
+        "en-IN": "Please tell us your issue.",
+        "te-IN": "దయచేసి మీ సమస్యను చెప్పండి.",
+    },
+    "one_moment": {
+        "hi-IN": "एक क्षण, हम आपकी जानकारी देख रहे हैं।",
+        "en-IN": "One moment please, we are checking.",
+        "te-IN": "ఒక్క క్షణం, మేము పరిశీలిస్తున్నాము.",
+    },
+    "error": {
+        "hi-IN": "माफ़ कीजिए, कोई समस्या हुई। कृपया दोबारा कॉल करें।",
+        "en-IN": "Sorry, there was an issue. Please call again.",
+        "te-IN": "క్షమించండి, సమస్య వచ్చింది. దయచేసి మళ్లీ కాల్ చేయండి.",
+    },
+    "goodbye": {
+        "hi-IN": "धन्यवाद। आपका दिन शुभ हो।",
+        "en-IN": "Thank you. Have a good day.",
+        "te-IN": "ధన్యవాదాలు. మంచి రోజు కలగాలి.",
+    },
+    "busy": {
+        "hi-IN": "इस समय कॉल बहुत ज़्यादा हैं। कृपया थोड़ी देर बाद दोबारा कोशिश करें। दोबारा बताने के लिए 1 दबाएं, कॉल खत्म करने के लिए 2 दबाएं।",
+        "en-IN": "We are experiencing a high call volume. Please try again in a few minutes. Press 1 to try again, 2 to end the call.",
+        "te-IN": "ప్రస్తుతం కాల్స్ ఎక్కువగా ఉన్నాయి. దయచేసి కొద్దిసేపటి తర్వాత మళ్లీ ప్రయత్నించండి. మళ్లీ ప్రయత్నించడానికి 1, ముగించడానికి 2 నొక్కండి.",
+    },
+}
+
+# Asset file names: <prompt>.<language>.<content hash>.wav
+_FILE_RE = re.compile(r'^[a-z_]+\.[a-zA-Z-]+\.[0-9a-f]{16}\.wav$')
+
+
+class PromptAssets:
+    """Manifest of built prompt audio, plus the file bytes (prompts are small, so they stay in memory)"""
+
+    def __init__(self, directory=PROMPT_ASSET_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # (prompt id, language) → {"file": name, "source": hash of text and voice settings}
+        self._manifest = {}
+        self._files = {}
+        # Bumped whenever the manifest changes, so pre-rendered TwiML picks up new URLs
+        self.version = 0
+        self.load()
+
+    def load(self):
+        """Read the manifest and asset files from disk; missing or broken files are skipped"""
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME), encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        manifest, files = {}, {}
+        for key, entry in entries.items():
+            prompt_id, _, language = key.partition('/')
+            if language not in PROMPTS.get(prompt_id, {}) or entry.get("source") != source_hash(prompt_id, language):
+                # Prompt removed or its text / voice changed since the build
+                continue
+            try:
+                with open(os.path.join(self.directory, entry["file"]), 'rb') as f:
+                    files[entry["file"]] = f.read()
+            except (OSError, KeyError, TypeError):
+                continue
+            manifest[(prompt_id, language)] = entry
+        with self._lock:
+            self._manifest, self._files = manifest, files
+            self.version += 1
+
+    def url(self, prompt_id, language):
+        """Relative URL of a prompt's audio, or None if it has not been built for the current text"""
+        entry = self._manifest.get((prompt_id, language))
+        if entry is None or not PROMPT_ASSETS:
+            return None
+        return f"/voice/prompts/{entry['file']}"
+
+    def get(self, filename):
+        """
+        Returns:
+            tuple: (audio_bytes, etag), or None for unknown files
+        """
+        data = self._files.get(filename)
+        if data is None:
+            return None
+        # The name already carries the content hash
+        return data, filename.rsplit('.', 2)[1]
+
+    def missing(self, force=False):
+        """(prompt id, language) pairs whose audio is absent or out of date"""
+        return [
+            (prompt_id, language)
+            for prompt_id, texts in PROMPTS.items()
+            for language in texts
+            if force or (prompt_id, language) not in self._manifest
+        ]
+
+    async def build(self, force=False):
+        """
+        Synthesize missing or outdated prompts and write them to disk
+
+        Returns:
+            tuple: (built, failed) counts
+        """
+        todo = self.missing(force)
+        if not todo:
+            return 0, 0
+        api_key = os.getenv("SARVAM_API_KEY")
+        if not api_key:
+            logger.warning("SARVAM_API_KEY not set; %s prompts stay on <Say>", len(todo))
+            return 0, len(todo)
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        async def _synthesize(prompt_id, language):
+            text = apply_tts_corrections(PROMPTS[prompt_id][language], language)
+            return prompt_id, language, await text_to_speech(text, language, api_key)
+
+        results = await asyncio.gather(*(_synthesize(prompt_id, language) for prompt_id, language in todo))
+
+        built, failed = 0, 0
+        with self._lock:
+            manifest, files = dict(self._manifest), dict(self._files)
+        for prompt_id, language, audio in results:
+            if not audio:
+                logger.warning("Could not synthesize prompt %s/%s", prompt_id, language)
+                failed += 1
+                continue
+            filename = f"{prompt_id}.{language}.{hashlib.sha256(audio).hexdigest()[:16]}.wav"
+            _write_atomic(os.path.join(self.directory, filename), audio)
+            manifest[(prompt_id, language)] = {"file": filename, "source": source_hash(prompt_id, language)}
+            files[filename] = audio
+            built += 1
+
+        # Drop files no longer referenced by the manifest
+        live = {entry["file"] for entry in manifest.values()}
+        files = {name: data for name, data in files.items() if name in live}
+        _write_atomic(
+            os.path.join(self.directory, MANIFEST_NAME),
+            json.dumps({f"{p}/{l}": entry for (p, l), entry in sorted(manifest.items())}, indent=2).encode('utf-8'),
+        )
+        for name in os.listdir(self.directory):
+            if _FILE_RE.match(name) and name not in live:
+                os.remove(os.path.join(self.directory, name))
+
+        with self._lock:
+            self._manifest, self._files = manifest, files
+            self.version += 1
+        logger.info("Prompt assets: %s built, %s failed", built, failed)
+        return built, failed
+
+
+def source_hash(prompt_id, language):
+    """Identity of what a prompt's audio was made from: text and voice settings"""
+    source = f"{TTS_MODEL}|{TTS_SPEAKER}|{language}|{PROMPTS[prompt_id][language]}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+prompt_assets = PromptAssets()
+
+
+async def build_in_background():
+    """Startup hook: build whatever is missing without delaying the server"""
+    if not PROMPT_ASSETS:
+        return
+    try:
+        await prompt_assets.build()
+    except Exception as e:
+        logger.error("Prompt asset build failed: %r", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="re-synthesize every prompt")
+    args = parser.parse_args()
+    pipeline_runtime.configure_logging()
+
+    built, failed = pipeline_runtime.run(prompt_assets.build(force=args.force))
+    total = sum(len(texts) for texts in PROMPTS.values())
+    print(f"Prompt assets in {PROMPT_ASSET_DIR}: {built} built, {failed} failed, {total - built - failed} up to date")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
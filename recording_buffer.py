@@ -0,0 +1,102 @@
+"""
+Recording buffer - one in-memory copy of a recording, filled by the download while
+any number of consumers (STT uploads, hedges, the auto-detect fan-out) stream it
+"""
+
+import asyncio
+import os
+
+# Refuse recordings larger than this (30 s of 8 kHz 16-bit PCM is under 0.5 MB)
+MAX_RECORDING_BYTES = int(os.getenv("MAX_RECORDING_BYTES", 5 * 1024 * 1024))
+
+
+class RecordingTooLarge(Exception):
+    pass
+
+
+class RecordingBuffer:
+    """
+    Append-only list of immutable chunks
+
+    The writer appends chunks and finally calls finish() (or fail()). Readers
+    iterate stream() concurrently from the start, waiting for chunks as they
+    arrive, so an upload can begin before the download has finished. Chunks are
+    never copied per reader, and once read() has joined them the joined copy is
+    the only one kept (as soon as no stream() reader is part-way through).
+    """
+
+    def __init__(self, max_bytes=MAX_RECORDING_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._joined = None
+        self._readers = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def done(self):
+        return self._done
+
+    async def append(self, chunk):
+        if self.size + len(chunk) > self.max_bytes:
+            raise RecordingTooLarge(f"recording over {self.max_bytes} bytes")
+        async with self._changed:
+            self._chunks.append(bytes(chunk))
+            self.size += len(chunk)
+            self._changed.notify_all()
+
+    async def finish(self):
+        async with self._changed:
+            self._done = True
+            self._changed.notify_all()
+
+    async def fail(self, error):
+        async with self._changed:
+            self._error = error
+            self._done = True
+            self._changed.notify_all()
+
+    async def stream(self):
+        """Yield every chunk from the beginning; raises the download's error if it failed"""
+        index = 0
+        self._readers += 1
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self._chunks) or self._done)
+                    if self._error is not None:
+                        raise self._error
+                    chunks = self._chunks[index:]
+                    finished = self._done
+                for chunk in chunks:
+                    yield chunk
+                index += len(chunks)
+                if finished and index >= len(self._chunks):
+                    return
+        finally:
+            self._readers -= 1
+            self._compact()
+
+    async def read(self):
+        """
+        The whole recording once the download has finished
+
+        Returns:
+            bytes, or None if the download failed
+        """
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._done)
+            if self._error is not None:
+                return None
+            if self._joined is None:
+                # Joined once; later readers share it
+                self._joined = self._chunks[0] if len(self._chunks) == 1 else b''.join(self._chunks)
+            self._compact()
+            return self._joined
+
+    def _compact(self):
+        """Drop the chunks in favour of the joined copy; a reader part-way through still indexes them"""
+        if self._joined is not None and self._readers == 0 and len(self._chunks) > 1:
+            self._chunks = [self._joined]
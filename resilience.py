@@ -0,0 +1,237 @@
+"""
+Resilience - per-turn deadline budgets, stage timeouts, hedged requests and circuit breakers
+for the upstream calls (recording download, Sarvam STT / LLM / TTS)
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+import aiohttp
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Twilio abandons a webhook after 15 s; leave room to render and send the TwiML
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", 12))
+
+# Stages of a turn in order, with the longest any single request in that stage may take
+STAGE_ORDER = ("download", "stt", "llm", "tts")
+STAGE_TIMEOUTS = {
+    "download": float(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", 3)),
+    "stt": float(os.getenv("STT_TIMEOUT_SECONDS", 5)),
+    "llm": float(os.getenv("LLM_TIMEOUT_SECONDS", 8)),
+    "tts": float(os.getenv("TTS_TIMEOUT_SECONDS", 5)),
+}
+# Budget held back for each later stage, so an early slow stage cannot starve the rest
+STAGE_RESERVE_SECONDS = float(os.getenv("STAGE_RESERVE_SECONDS", 1.0))
+
+# Hedging: duplicate an idempotent request that has not answered within the stage's recent p95
+HEDGING = os.getenv("HEDGING", "1") == "1"
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", 1.0))
+HEDGE_MIN_DELAY = 0.15
+# p95 is only trusted once a series has this many samples
+HEDGE_MIN_SAMPLES = 20
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 10))
+
+# Gauge values for voice_circuit_state
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+_deadline = contextvars.ContextVar("turn_deadline", default=None)
+
+
+class Unavailable(Exception):
+    """An upstream call was not attempted"""
+    status = "unavailable"
+
+
+class DeadlineExceeded(Unavailable):
+    status = "deadline"
+
+
+class CircuitOpen(Unavailable):
+    status = "circuit_open"
+
+
+class Deadline:
+    """Absolute expiry time of the current turn"""
+
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+
+@contextmanager
+def deadline(seconds=TURN_DEADLINE_SECONDS):
+    """Run a turn under a deadline; stage timeouts inside it are carved from what is left"""
+    token = _deadline.set(Deadline(seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline():
+    """The Deadline of the turn running in this context, or None outside a turn"""
+    return _deadline.get()
+
+
+@contextmanager
+def using_deadline(turn_deadline):
+    """Run under an existing Deadline (or none), e.g. one request made on behalf of several turns"""
+    token = _deadline.set(turn_deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def stage_timeout(stage):
+    """
+    Seconds the next request of a stage may take
+
+    The stage's own cap, reduced so that every later stage keeps its reserve;
+    whatever earlier stages did not use carries forward.
+    Raises DeadlineExceeded when the turn has no time left.
+    """
+    cap = STAGE_TIMEOUTS[stage]
+    turn = _deadline.get()
+    if turn is None:
+        return cap
+    remaining = turn.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"turn deadline passed before {stage}")
+    later_stages = len(STAGE_ORDER) - STAGE_ORDER.index(stage) - 1
+    available = remaining - later_stages * STAGE_RESERVE_SECONDS
+    # Past the reserves, the stage still gets what is left rather than nothing
+    return min(cap, max(available, min(remaining, STAGE_RESERVE_SECONDS)))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one upstream endpoint
+
+    closed → open after BREAKER_FAILURES failures in a row; open rejects calls
+    for BREAKER_RESET_SECONDS, then half-open lets a single probe through.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        metrics.set_gauge("voice_circuit_state", CLOSED, endpoint=name)
+
+    def allow(self):
+        now = time.monotonic()
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now - self.opened_at < self.reset_seconds:
+                return False
+            self._set_state(HALF_OPEN)
+        elif now - self.probe_started < self.reset_seconds:
+            # Half-open: one probe at a time (a lost probe is replaced after a reset period)
+            return False
+        self.probe_started = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != CLOSED:
+            logger.info("Circuit %s closed", self.name)
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            logger.warning("Circuit %s open after %s failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge("voice_circuit_state", state, endpoint=self.name)
+
+
+breakers = {stage: CircuitBreaker(stage) for stage in STAGE_ORDER}
+
+
+def request_timeout(stage):
+    """
+    Admission check before an upstream request
+
+    Returns:
+        aiohttp.ClientTimeout for the request
+    Raises:
+        DeadlineExceeded or CircuitOpen when the request should not be sent
+    """
+    timeout = stage_timeout(stage)
+    if not breakers[stage].allow():
+        raise CircuitOpen(f"{stage} circuit open")
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+def record(stage, status=None):
+    """Feed an upstream outcome to the stage's breaker; None (no response), 429 and 5xx are failures"""
+    if status is None or status == 429 or status >= 500:
+        breakers[stage].record_failure()
+    else:
+        breakers[stage].record_success()
+
+
+def hedge_delay(stage, **labels):
+    """Wait before duplicating a request: the stage's recent p95, or a default until there is enough data"""
+    p95 = metrics.quantile("voice_stage_seconds", 0.95, min_samples=HEDGE_MIN_SAMPLES, stage=stage, **labels)
+    return max(HEDGE_MIN_DELAY, p95 if p95 is not None else HEDGE_DEFAULT_DELAY)
+
+
+async def hedged(attempt, stage, **labels):
+    """
+    Run an idempotent request with one hedge
+
+    attempt() makes one request and returns its result or None on failure.
+    If the first attempt is still running after hedge_delay(), a duplicate is
+    started; the first non-None result wins and the other attempt is cancelled.
+    """
+    first = asyncio.ensure_future(attempt())
+    if not HEDGING:
+        return await first
+
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay(stage, **labels))
+        if not done and breakers[stage].state == CLOSED and _has_time_for(stage):
+            metrics.inc("voice_hedged_requests_total", stage=stage)
+            tasks.add(asyncio.ensure_future(attempt()))
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                if result is not None:
+                    if task is not first:
+                        metrics.inc("voice_hedge_wins_total", stage=stage)
+                    return result
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _has_time_for(stage):
+    turn = _deadline.get()
+    return turn is None or turn.remaining() > HEDGE_MIN_DELAY + (len(STAGE_ORDER) - STAGE_ORDER.index(stage) - 1) * STAGE_RESERVE_SECONDS
+
+
+metrics.describe("voice_circuit_state", "Circuit breaker state per upstream stage (0 closed, 1 half-open, 2 open)")
+metrics.describe("voice_hedged_requests_total", "Duplicate requests started because the first was slower than p95")
+metrics.describe("voice_hedge_wins_total", "Hedged requests whose duplicate answered first")
@@ -0,0 +1,150 @@
+"""
+Response cache - LLM reply text and synthesized audio keyed on normalized transcript + language
+Memory-bounded LRU with TTL, a byte budget and hit/miss counters
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import metrics
+
+CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2000))
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 15 * 60))
+
+# Rough per-entry bookkeeping cost (key, tuple, OrderedDict node)
+ENTRY_OVERHEAD_BYTES = 200
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_transcript(text):
+    """Canonical form of a transcript: NFC, case-folded, punctuation dropped, whitespace collapsed"""
+    text = unicodedata.normalize('NFC', text).casefold()
+    text = ''.join(' ' if unicodedata.category(char).startswith('P') else char for char in text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+class ResponseCache:
+    """LRU of (response_text, response_audio) with TTL and a size-in-bytes budget"""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every store, so a snapshot can tell whether anything changed
+        self.changes = 0
+
+    @staticmethod
+    def make_key(transcript, language):
+        return language, normalize_transcript(transcript)
+
+    def get(self, transcript, language):
+        """
+        Look up a cached reply
+
+        Returns:
+            tuple: (response_text, response_audio_bytes_or_None), or None on a miss
+        """
+        key = self.make_key(transcript, language)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if isinstance(entry[2], memoryview):
+                # Restored from a mapped snapshot: copied out on first use
+                entry = self._entries[key] = entry[:2] + (bytes(entry[2]),) + entry[3:]
+            return entry[1], entry[2]
+
+    def put(self, transcript, language, response_text, response_audio=None):
+        """Store a reply; audio may be None when only the text is known"""
+        key = self.make_key(transcript, language)
+        size = len(response_text.encode('utf-8')) + len(response_audio or b'') + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response_text, response_audio, size)
+            self.size_bytes += size
+            self.changes += 1
+            while self._entries and (self.size_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def export(self):
+        """
+        Live entries, least recently used first, for a snapshot
+
+        Returns:
+            list of (key, expires_at, response_text, response_audio_or_None); expires_at is
+            wall-clock (time.time()), so time spent down before a restore still counts
+        """
+        now = time.monotonic()
+        wall_now = time.time()
+        with self._lock:
+            return [
+                (key, wall_now + entry[0] - now, entry[1], entry[2])
+                for key, entry in self._entries.items()
+                if entry[0] > now
+            ]
+
+    def restore(self, entries):
+        """Add entries from export() (audio may be a memoryview into a mapped file); returns how many fit"""
+        now = time.monotonic()
+        wall_now = time.time()
+        restored = 0
+        with self._lock:
+            # Most recent first, so they win the budget; each goes in behind what traffic already cached
+            for key, expires_at, response_text, response_audio in reversed(entries):
+                size = len(response_text.encode('utf-8')) + len(response_audio or b'') + ENTRY_OVERHEAD_BYTES
+                seconds_left = expires_at - wall_now
+                if key in self._entries or seconds_left <= 0:
+                    continue
+                if self.size_bytes + size > self.max_bytes or len(self._entries) >= self.max_entries:
+                    break
+                self._entries[key] = (now + seconds_left, response_text, response_audio, size)
+                self._entries.move_to_end(key, last=False)
+                self.size_bytes += size
+                restored += 1
+        return restored
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size_bytes -= entry[3]
+
+
+response_cache = ResponseCache()
+metrics.register_collector(lambda: {f"voice_response_cache_{name}": value for name, value in response_cache.stats().items()})
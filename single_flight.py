@@ -0,0 +1,67 @@
+"""
+Single-flight - one run per key, however many times it is requested
+Duplicate requests join the run in flight; a finished result is kept briefly for late duplicates
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+import metrics
+
+# How long a finished result still answers duplicates (Twilio retries, fallback URLs)
+SINGLE_FLIGHT_RETENTION_SECONDS = float(os.getenv("SINGLE_FLIGHT_RETENTION_SECONDS", 60))
+
+
+class SingleFlight:
+    """Key → concurrent.futures.Future of its one run"""
+
+    def __init__(self, name, retention_seconds=SINGLE_FLIGHT_RETENTION_SECONDS):
+        self.name = name
+        self.retention_seconds = retention_seconds
+        self._futures = {}
+        # Finished keys in completion order → when they stop being replayed
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, start):
+        """
+        The future for key: the existing one, or start() called to begin a run
+
+        start must return a concurrent.futures.Future (e.g. pipeline_runtime.submit(...)).
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            future = self._futures.get(key)
+            if future is not None:
+                metrics.inc("voice_single_flight_total", flight=self.name, result="replayed" if future.done() else "joined")
+                return future
+            future = self._futures[key] = start()
+        metrics.inc("voice_single_flight_total", flight=self.name, result="started")
+        # Outside the lock: runs right here if the future is already done
+        future.add_done_callback(lambda done: self._done(key, done))
+        return future
+
+    def __len__(self):
+        return len(self._futures)
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._futures.get(key) is not future:
+                return
+            if future.cancelled() or self.retention_seconds <= 0:
+                # A cancelled run (caller hung up) is not an answer to replay
+                del self._futures[key]
+                return
+            self._finished[key] = time.monotonic() + self.retention_seconds
+
+    def _expire(self, now):
+        while self._finished:
+            key, expires = next(iter(self._finished.items()))
+            if expires >= now:
+                break
+            del self._finished[key]
+            self._futures.pop(key, None)
+
+
+metrics.describe("voice_single_flight_total", "Single-flight requests by result: started a run, joined one in flight, or replayed a finished one")
@@ -0,0 +1,372 @@
+"""
+Speech text - turns reply text into what should be spoken, per language (hi-IN, te-IN, en-IN)
+
+normalize(): numbers, times, dates, ranges, units, currency and abbreviations to words
+fit(): keeps whole sentences within a character (or estimated audio-duration) budget,
+cutting a sentence at a word boundary only when the first one alone is too long
+
+Both are local and deterministic, so the LLM prompt no longer has to ask for either.
+"""
+
+import os
+import re
+
+# Character budget for one TTS input (Sarvam's limit is 500)
+TTS_MAX_CHARS = int(os.getenv("TTS_MAX_CHARS", 500))
+# Optional budget in seconds of reply audio (0 = characters only), converted with CHARS_PER_SECOND
+TTS_MAX_SECONDS = float(os.getenv("TTS_MAX_SECONDS", 0))
+# Rough speaking rate of the TTS voice at pace 1.0, in characters of normalized text per second
+CHARS_PER_SECOND = {"hi-IN": 14, "te-IN": 12, "en-IN": 15}
+
+HI_UNDER_100 = (
+    "शून्य एक दो तीन चार पाँच छह सात आठ नौ "
+    "दस ग्यारह बारह तेरह चौदह पंद्रह सोलह सत्रह अठारह उन्नीस "
+    "बीस इक्कीस बाईस तेईस चौबीस पच्चीस छब्बीस सत्ताईस अट्ठाईस उनतीस "
+    "तीस इकतीस बत्तीस तैंतीस चौंतीस पैंतीस छत्तीस सैंतीस अड़तीस उनतालीस "
+    "चालीस इकतालीस बयालीस तैंतालीस चवालीस पैंतालीस छियालीस सैंतालीस अड़तालीस उनचास "
+    "पचास इक्यावन बावन तिरपन चौवन पचपन छप्पन सत्तावन अट्ठावन उनसठ "
+    "साठ इकसठ बासठ तिरसठ चौंसठ पैंसठ छियासठ सड़सठ अड़सठ उनहत्तर "
+    "सत्तर इकहत्तर बहत्तर तिहत्तर चौहत्तर पचहत्तर छिहत्तर सतहत्तर अठहत्तर उन्यासी "
+    "अस्सी इक्यासी बयासी तिरासी चौरासी पचासी छियासी सत्तासी अट्ठासी नवासी "
+    "नब्बे इक्यानबे बानबे तिरानबे चौरानबे पंचानबे छियानबे सत्तानबे अट्ठानबे निन्यानबे"
+).split()
+TE_UNDER_20 = (
+    "సున్నా ఒకటి రెండు మూడు నాలుగు ఐదు ఆరు ఏడు ఎనిమిది తొమ్మిది "
+    "పది పదకొండు పన్నెండు పదమూడు పద్నాలుగు పదిహేను పదహారు పదిహేడు పద్దెనిమిది పంతొమ్మిది"
+).split()
+TE_TENS = "_ _ ఇరవై ముప్పై నలభై యాభై అరవై డెబ్బై ఎనభై తొంభై".split()
+EN_UNDER_20 = (
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen "
+    "fourteen fifteen sixteen seventeen eighteen nineteen"
+).split()
+EN_TENS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+
+# Indian grouping: (value, hi, te singular, te plural, te before more or a noun, en)
+SCALES = (
+    (10 ** 7, "करोड़", "కోటి", "కోట్లు", "కోట్ల", "crore"),
+    (10 ** 5, "लाख", "లక్ష", "లక్షలు", "లక్షల", "lakh"),
+    (1000, "हज़ार", "వెయ్యి", "వేలు", "వేల", "thousand"),
+    (100, "सौ", "వంద", "వందలు", "వందల", "hundred"),
+)
+
+WORDS = {
+    "point": {"hi-IN": "दशमलव", "te-IN": "పాయింట్", "en-IN": "point"},
+    "to": {"hi-IN": "से", "te-IN": "నుండి", "en-IN": "to"},
+    "minus": {"hi-IN": "माइनस", "te-IN": "మైనస్", "en-IN": "minus"},
+    "and": {"hi-IN": "और", "te-IN": "మరియు", "en-IN": "and"},
+}
+
+MONTHS = {
+    "hi-IN": "जनवरी फ़रवरी मार्च अप्रैल मई जून जुलाई अगस्त सितंबर अक्टूबर नवंबर दिसंबर".split(),
+    "te-IN": "జనవరి ఫిబ్రవరి మార్చి ఏప్రిల్ మే జూన్ జూలై ఆగస్టు సెప్టెంబర్ అక్టోబర్ నవంబర్ డిసెంబర్".split(),
+    "en-IN": "January February March April May June July August September October November December".split(),
+}
+
+# Part of the day by starting hour, for spoken times
+DAY_PARTS = {
+    "hi-IN": ((5, "सुबह"), (12, "दोपहर"), (16, "शाम"), (20, "रात")),
+    "te-IN": ((5, "ఉదయం"), (12, "మధ్యాహ్నం"), (16, "సాయంత్రం"), (20, "రాత్రి")),
+}
+
+# Unit after a number → spoken word per language (matched case-sensitively, so "A" stays a letter)
+UNITS = {
+    "kWh": {"hi-IN": "यूनिट", "te-IN": "యూనిట్లు", "en-IN": "units"},
+    "kW": {"hi-IN": "किलोवाट", "te-IN": "కిలోవాట్లు", "en-IN": "kilowatts"},
+    "MW": {"hi-IN": "मेगावाट", "te-IN": "మెగావాట్లు", "en-IN": "megawatts"},
+    "kV": {"hi-IN": "किलोवोल्ट", "te-IN": "కిలోవోల్ట్లు", "en-IN": "kilovolts"},
+    "V": {"hi-IN": "वोल्ट", "te-IN": "వోల్ట్లు", "en-IN": "volts"},
+    "km": {"hi-IN": "किलोमीटर", "te-IN": "కిలోమీటర్లు", "en-IN": "kilometres"},
+    "%": {"hi-IN": "प्रतिशत", "te-IN": "శాతం", "en-IN": "percent"},
+    "hrs": {"hi-IN": "घंटे", "te-IN": "గంటలు", "en-IN": "hours"},
+    "hr": {"hi-IN": "घंटे", "te-IN": "గంటలు", "en-IN": "hours"},
+    "mins": {"hi-IN": "मिनट", "te-IN": "నిమిషాలు", "en-IN": "minutes"},
+    "min": {"hi-IN": "मिनट", "te-IN": "నిమిషాలు", "en-IN": "minutes"},
+    "Rs.": {"hi-IN": "रुपये", "te-IN": "రూపాయలు", "en-IN": "rupees"},
+    "Rs": {"hi-IN": "रुपये", "te-IN": "రూపాయలు", "en-IN": "rupees"},
+    "rs": {"hi-IN": "रुपये", "te-IN": "రూపాయలు", "en-IN": "rupees"},
+    "₹": {"hi-IN": "रुपये", "te-IN": "రూపాయలు", "en-IN": "rupees"},
+}
+
+ABBREVIATIONS = {
+    "en-IN": {
+        "Dr.": "Doctor", "Govt.": "Government", "Dept.": "Department", "approx.": "approximately",
+        "e.g.": "for example", "i.e.": "that is", "etc.": "et cetera", "No.": "number", "vs": "versus",
+    },
+    "hi-IN": {"डॉ.": "डॉक्टर", "नं.": "नंबर", "कृ.": "कृपया"},
+    "te-IN": {"డా.": "డాక్టర్", "నెం.": "నెంబర్"},
+}
+
+# Sentence boundaries: danda / double danda always end a sentence; ".", "?" and "!"
+# only when followed by whitespace, so "2.5" or "10.30" are not split
+SENTENCE_END_RE = re.compile(r'[।॥]|[.?!](?=\s)')
+
+_NUMBER = r'\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?'
+_DATE_RE = re.compile(r'(?<![\d.:/-])(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})(?![\d/-])')
+# "6:30", "18:30", "6:30 PM", "6 pm"; a unit word already after the time is replaced with ours
+_TIME_RE = re.compile(
+    r'(?<![\d:.,])(\d{1,2})(?::(\d{2}))?(?![\d:.,]\d)'
+    r'(?:\s*([AaPp])\.?[Mm](?![A-Za-z])(?:\.(?=\s+[a-z]))?)?(?:\s*(बजे|గంటలకు|గంటల|o\'clock))?'
+)
+_RANGE = rf'(?:{_NUMBER})(?:\s*[-–]\s*(?:{_NUMBER}))?'
+_RANGE_RE = re.compile(rf'(?<![\d.,])({_NUMBER})\s*[-–]\s*({_NUMBER})(?![\d,])')
+_CURRENCY_RE = re.compile(rf'(₹|\bRs\.?|\brs\.?)\s*({_RANGE})')
+_UNIT_RE = re.compile(
+    rf'(?<![\w.,])({_RANGE})\s*(' + '|'.join(re.escape(unit) for unit in sorted(UNITS, key=len, reverse=True)) + r')(?!\w)'
+)
+_ORDINAL_RE = re.compile(r'\b(\d+)(?:st|nd|rd|th)\b')
+_NUMBER_RE = re.compile(rf'(?<![\w.])-?(?:{_NUMBER})(?!\w)')
+_SPACES_RE = re.compile(r'[ \t]{2,}')
+
+
+def number_words(number, language):
+    """Non-negative integer → words, Indian grouping (lakh, crore)"""
+    if number < 100:
+        return _under_100(number, language)
+    for value, hi, te_one, te_many, te_more, en in SCALES:
+        if number >= value:
+            count, rest = divmod(number, value)
+            break
+    head = number_words(count, language)
+    rest_words = number_words(rest, language) if rest else ""
+    if language == "te-IN":
+        if count == 1:
+            # "వంద" / "నూట ఇరవై", "వెయ్యి", "లక్ష"
+            head = "నూట" if value == 100 and rest else te_one
+        else:
+            head = f"{head} {te_many if not rest else te_more}"
+    elif language == "hi-IN":
+        head = f"{head} {hi}"
+    else:
+        head = f"{head} {en}"
+    return f"{head} {rest_words}".strip()
+
+
+def _under_100(number, language):
+    if language == "hi-IN":
+        return HI_UNDER_100[number]
+    under_20, tens = (TE_UNDER_20, TE_TENS) if language == "te-IN" else (EN_UNDER_20, EN_TENS)
+    if number < 20:
+        return under_20[number]
+    ten, unit = divmod(number, 10)
+    if not unit:
+        return tens[ten]
+    return f"{tens[ten]}{'-' if language == 'en-IN' else ' '}{under_20[unit]}"
+
+
+def digits_words(digits, language):
+    """Read a digit string one digit at a time (phone and account numbers)"""
+    return " ".join(_under_100(int(digit), language) for digit in digits)
+
+
+def decimal_words(text, language):
+    """"1,20,000" / "2.5" / "-3" → words; long plain digit strings are read digit by digit"""
+    negative = text.startswith('-')
+    text = text.lstrip('-')
+    whole, _, fraction = text.partition('.')
+    if is_digit_string(whole):
+        words = digits_words(whole, language)
+    else:
+        words = number_words(int(whole.replace(',', '')), language)
+    if fraction:
+        words += f" {WORDS['point'][language]} {digits_words(fraction, language)}"
+    return f"{WORDS['minus'][language]} {words}" if negative else words
+
+
+def is_digit_string(text):
+    """Phone, account and complaint numbers: read digit by digit, never as amounts"""
+    whole = text.lstrip('-').partition('.')[0]
+    return ',' not in whole and (len(whole) >= 6 or (len(whole) > 1 and whole.startswith('0')))
+
+
+def amount_words(text, language, before_noun=False):
+    """
+    A number or a range ("2-3") in words; before_noun uses the Telugu form that
+    precedes a noun ("ఐదు వందల రూపాయలు", not "ఐదు వందలు రూపాయలు")
+    """
+    low, dash, high = re.split(r'\s*([-–])\s*', text, maxsplit=1) if re.search(r'\d\s*[-–]', text) else (text, '', '')
+    if dash and (is_digit_string(low) or is_digit_string(high)):
+        # "040-2343 1008" is one number, not a range
+        return f"{digits_words(low, language)} {digits_words(high, language)}"
+    words = decimal_words(low, language)
+    if dash:
+        words += f" {WORDS['to'][language]} {decimal_words(high, language)}"
+    if before_noun and language == "te-IN":
+        for _, _, _, plural, oblique, _ in SCALES:
+            if words.endswith(plural):
+                return words[:-len(plural)] + oblique
+    return words
+
+
+def ordinal_words(number, language):
+    """English ordinals ("21st" → "twenty-first"); other languages keep the cardinal"""
+    words = number_words(number, language)
+    if language != "en-IN":
+        return words
+    for cardinal, ordinal in (("one", "first"), ("two", "second"), ("three", "third"), ("five", "fifth"),
+                              ("eight", "eighth"), ("nine", "ninth"), ("twelve", "twelfth")):
+        if words.endswith(cardinal):
+            return words[:-len(cardinal)] + ordinal
+    return words[:-1] + "ieth" if words.endswith("y") else words + "th"
+
+
+def spoken_time(hour, minute, language, meridiem=None, unit=None):
+    """
+    A clock time in words: "शाम साढ़े छह बजे", "సాయంత్రం ఆరు గంటల ముప్పై నిమిషాల", "six thirty PM"
+
+    The part of the day is only said when it is known (24-hour time or AM / PM).
+    """
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem in "Pp" else 0)
+    known = meridiem is not None or hour > 12 or hour == 0
+    clock = (hour - 1) % 12 + 1
+
+    if language == "en-IN":
+        words = number_words(clock, language)
+        if minute:
+            words += f" {'oh ' if minute < 10 else ''}{number_words(minute, language)}"
+        if known:
+            return f"{words} {'AM' if hour < 12 else 'PM'}"
+        return words if minute else f"{words} o'clock"
+
+    part = ""
+    if known:
+        part = DAY_PARTS[language][-1][1]
+        for start, name in DAY_PARTS[language]:
+            if hour >= start:
+                part = name
+        part += " "
+
+    if language == "hi-IN":
+        if minute == 30 and clock in (1, 2):
+            words = "डेढ़" if clock == 1 else "ढाई"
+        elif minute == 30:
+            words = f"साढ़े {number_words(clock, language)}"
+        elif minute == 15:
+            words = f"सवा {number_words(clock, language)}"
+        elif minute == 45:
+            words = f"पौने {number_words(clock % 12 + 1, language)}"
+        elif minute:
+            return f"{part}{number_words(clock, language)} बजकर {number_words(minute, language)} मिनट"
+        else:
+            words = number_words(clock, language)
+        return f"{part}{words} बजे"
+
+    # Telugu: oblique "గంటల" unless the text had "గంటలకు" (at); one o'clock is "ఒంటి గంట"
+    suffix = "కు" if unit == "గంటలకు" else ""
+    hours = "ఒంటి గంట" if clock == 1 else f"{number_words(clock, language)} గంటల"
+    if minute:
+        return f"{part}{hours} {number_words(minute, language)} నిమిషాల{suffix}"
+    return f"{part}{hours}{suffix}"
+
+
+def date_words(day, month, year, language):
+    """Day, month name and year, or None if it is not a real calendar date"""
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return None
+    if year < 100:
+        year += 2000
+    month_name = MONTHS[language][month - 1]
+    if language == "en-IN":
+        century, rest = divmod(year, 100)
+        if 10 <= rest and century in (19, 20):
+            year_words = f"{number_words(century, language)} {number_words(rest, language)}"
+        else:
+            year_words = number_words(year, language)
+        return f"{ordinal_words(day, language)} {month_name} {year_words}"
+    return f"{number_words(day, language)} {month_name} {number_words(year, language)}"
+
+
+def normalize(text, language):
+    """Spell out everything the TTS voice should not have to guess at"""
+    if not text:
+        return text
+    if language not in MONTHS:
+        language = "hi-IN"
+
+    for abbreviation, expansion in ABBREVIATIONS[language].items():
+        text = re.sub(rf'(?<!\w){re.escape(abbreviation)}(?!\w)', expansion, text)
+    text = text.replace('&', f" {WORDS['and'][language]} ")
+
+    def date(match):
+        words = date_words(int(match.group(1)), int(match.group(2)), int(match.group(3)), language)
+        return words or match.group(0)
+
+    def time(match):
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if match.group(2) is None and match.group(3) is None:
+            # A bare number, even before "बजे"; the number pass reads it
+            return match.group(0)
+        if hour > 23 or minute > 59 or (match.group(3) and not 1 <= hour <= 12):
+            return match.group(0)
+        return spoken_time(hour, minute, language, match.group(3), match.group(4))
+
+    def currency(match):
+        return f"{amount_words(match.group(2), language, before_noun=True)} {UNITS[match.group(1)][language]}"
+
+    def unit(match):
+        return f"{amount_words(match.group(1), language, before_noun=True)} {UNITS[match.group(2)][language]}"
+
+    text = _DATE_RE.sub(date, text)
+    text = _TIME_RE.sub(time, text)
+    text = _CURRENCY_RE.sub(currency, text)
+    text = _UNIT_RE.sub(unit, text)
+    text = _RANGE_RE.sub(lambda match: amount_words(match.group(0), language), text)
+    text = _ORDINAL_RE.sub(lambda match: ordinal_words(int(match.group(1)), language), text)
+    text = _NUMBER_RE.sub(lambda match: decimal_words(match.group(0), language), text)
+    return _SPACES_RE.sub(' ', text).strip()
+
+
+def budget(language):
+    """Characters of normalized text allowed in one TTS input"""
+    if TTS_MAX_SECONDS > 0:
+        return min(TTS_MAX_CHARS, int(TTS_MAX_SECONDS * CHARS_PER_SECOND.get(language, 14)))
+    return TTS_MAX_CHARS
+
+
+def split_sentences(text):
+    """
+    Finished sentences, and the unfinished text after the last one
+
+    Returns:
+        tuple: (list of sentences, rest); the end of the text counts as whitespace
+    """
+    parts, start = [], 0
+    for match in SENTENCE_END_RE.finditer(text + ' '):
+        sentence = text[start:match.end()].strip()
+        start = match.end()
+        if sentence:
+            parts.append(sentence)
+    return parts, text[start:].strip()
+
+
+def sentences(text):
+    """All sentences of a complete text, including an unpunctuated last one"""
+    parts, rest = split_sentences(text)
+    return parts + [rest] if rest else parts
+
+
+def whole_sentences(text):
+    """Drop an unfinished last sentence (a reply cut off by max_tokens), unless that is all there is"""
+    parts, rest = split_sentences(text)
+    return " ".join(parts if parts else [rest])
+
+
+def fit(text, limit):
+    """
+    The longest run of whole sentences within limit characters
+
+    If even the first sentence is too long, it is cut at the last word boundary
+    (never mid-word, and without a trailing "..." that TTS would read out).
+    """
+    if len(text) <= limit:
+        return text
+    kept = ""
+    for sentence in sentences(text):
+        candidate = f"{kept} {sentence}" if kept else sentence
+        if len(candidate) > limit:
+            break
+        kept = candidate
+    if kept:
+        return kept
+    cut = text[:limit + 1].rsplit(None, 1)[0] if ' ' in text[:limit + 1] else text[:limit]
+    return cut.rstrip(' ,;:-–')
@@ -0,0 +1,48 @@
+"""
+Startup profile - times the import groups and boot steps of a server process and prints
+the breakdown once it is ready, so cold-start regressions show up in the deploy log
+"""
+
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STARTED = time.perf_counter()
+_steps = []
+
+
+@contextmanager
+def step(name):
+    """Time one import group or boot step"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps.append((name, time.perf_counter() - start))
+
+
+def report(title="Startup"):
+    """Print each recorded step and the total since this module was imported"""
+    total = time.perf_counter() - STARTED
+    print(f"{title}: ready in {total * 1000:.0f} ms")
+    for name, seconds in _steps:
+        print(f"  {name:<28}{seconds * 1000:>7.0f} ms")
+
+
+def preload(*modules):
+    """Import modules only needed once a call is in progress, on a background thread after boot"""
+    def _import():
+        for name in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logger.warning("Preload of %s failed: %r", name, e)
+                continue
+            logger.debug("Preloaded %s in %.0f ms", name, (time.perf_counter() - start) * 1000)
+
+    threading.Thread(target=_import, name="preload", daemon=True).start()
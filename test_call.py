@@ -1,14 +1,30 @@
 import os
-import base64
-import requests
+import asyncio
+import logging
+import json
+import threading
 from flask import Flask, request, Response
 from dotenv import load_dotenv
-from twilio.twiml.voice_response import VoiceResponse, Start, Stream
+from twilio.twiml.voice_response import VoiceResponse, Connect
 
 load_dotenv()
+
+import metrics
+import pipeline_runtime
+import resilience
+from audio_codec import decode_media_payload, pcm_to_wav
+from caller_profiles import caller_profiles
+from media_out import MediaPacer, encode_for_stream
+from vad import MIN_UTTERANCE_MS, UtteranceDetector
+from voice_pipeline import LLM_STREAMING, process_audio, process_audio_stream
+
+logger = logging.getLogger(__name__)
+pipeline_runtime.configure_logging()
+
 app = Flask(__name__)
 
-SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
+# Caller speech during bot playback cancels the reply (barge-in)
+BARGE_IN = os.getenv("BARGE_IN", "1") == "1"
 
 # -------------------------------
 # 1. INBOUND CALL HANDLER
@@ -16,22 +32,21 @@ SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
 @app.post("/voice/incoming")
 def incoming_call():
     """
-    This answers the call and starts streaming audio in 16k L16
-    (Telugu requires clarity)
+    This answers the call and connects it to a bidirectional media stream
+    (8 kHz μ-law both ways), so replies and barge-in clears can be sent back
     """
 
     response = VoiceResponse()
 
-    start = Start()
-    start.stream(
-        url=f"wss://{request.host}/media",  # WebSocket
-        track="inbound_audio",
-        codec="audio/l16;rate=16000"        # CRITICAL for Telugu
-    )
-    response.append(start)
-
     response.say("Welcome. Telugu, Hindi or English lo matladandi.", language="en-IN")
 
+    # <Connect> (not <Start>): Twilio only plays media / honours mark and clear on a bidirectional stream
+    connect = Connect()
+    stream = connect.stream(url=f"wss://{request.host}/media")  # WebSocket
+    # Lets the stream look up the caller's remembered language
+    stream.parameter(name="from", value=request.values.get("From", ""))
+    response.append(connect)
+
     return Response(str(response), mimetype="text/xml")
 
 
@@ -44,88 +59,148 @@ sock = Sock(app)
 @sock.route('/media')
 def media_stream(ws):
     """
-    Receives Twilio audio (base64 PCM), sends to Sarvam STT,
-    gets auto-language detection, and returns TTS audio.
+    Receives Twilio audio (base64 PCM), endpoints it into utterances with a
+    VAD, sends each complete utterance through the voice pipeline
+    (auto-language STT → LLM → TTS) and returns TTS audio.
     """
 
-    print("🔵 Media Stream Connected")
-
-    while True:
-        message = ws.receive()
-        if not message:
-            break
-
-        # Twilio sends JSON messages, speech frames come in "media"
-        import json
-        msg = json.loads(message)
-
-        if msg.get("event") == "media":
-            audio_b64 = msg["media"]["payload"]
-
-            # -------------------------------
-            # SEND AUDIO TO SARVAM STT
-            # -------------------------------
-            stt_payload = {
-                "config": {
-                    "language": "auto",       # Hindi + English + Telugu detection
-                    "task": "transcribe"
-                },
-                "audio": audio_b64
-            }
-
-            stt_resp = requests.post(
-                "https://api.sarvam.ai/speech-to-text",
-                json=stt_payload,
-                headers={"Authorization": f"Bearer {SARVAM_API_KEY}"}
-            ).json()
-
-            text = stt_resp.get("text", "").strip()
-            if text:
-                print(f"👂 Heard → {text}")
-
-                # -------------------------------
-                # Detect language
-                # -------------------------------
-                detected_lang = stt_resp.get("language", "en")
-
-                print(f"🌐 Detected language → {detected_lang}")
+    logger.info("🔵 Media Stream Connected")
+
+    stream_sid = None
+    caller = None
+    language = "auto"       # the caller's remembered language skips auto-detection
+    encoding = "audio/x-mulaw"
+    detector = UtteranceDetector(sample_rate=8000)
+
+    # Barge-in state, shared with the turn running on the pipeline loop
+    current_turn = None     # concurrent.futures.Future of the turn in flight
+    generation = 0          # bumped on barge-in; audio from older turns is dropped
+    pacer = None            # paces outbound frames once the stream has started
+    state_lock = threading.Lock()
+
+    def send_audio(response_audio, turn_generation):
+        # -------------------------------
+        # RETURN AUDIO TO TWILIO STREAM (8 kHz μ-law, 20 ms frames in real time)
+        # -------------------------------
+        with metrics.stage_timer("encode"):
+            frames = encode_for_stream(response_audio)
+        with state_lock:
+            if turn_generation != generation or pacer is None or not frames:
+                return
+            pacer.play(frames)
+
+    def stop_playback():
+        """Speech onset: stop talking over the caller, but keep the turn (it may only be a cough)"""
+        with state_lock:
+            playing = pacer is not None and pacer.clear()
+        if playing:
+            logger.debug("Playback stopped at speech onset")
+
+    def barge_in():
+        """Caller is really talking over the bot: stop its playback and drop the turn's LLM / TTS work"""
+        nonlocal current_turn, generation
+        with state_lock:
+            generation += 1
+            turn, current_turn = current_turn, None
+            # Drops our queued frames and whatever Twilio still has buffered
+            playing = pacer is not None and pacer.clear()
+        cancelled = turn is not None and turn.cancel()
+        if playing or cancelled:
+            metrics.inc("voice_barge_ins_total", cancelled_turn=cancelled)
+            logger.info("✋ Barge-in (playing=%s, cancelled turn=%s)", playing, cancelled)
+
+    def remember_language(detected_lang):
+        nonlocal language
+        if language == "auto" and detected_lang:
+            # Later turns and calls from this number skip the detection STT calls
+            language = detected_lang
+            caller_profiles.remember(caller, detected_lang)
+
+    async def run_turn(wav, turn_generation):
+        if LLM_STREAMING:
+            # Each sentence is played as soon as its TTS is ready
+            async for sentence, sentence_audio, detected_lang in process_audio_stream(wav, language=language):
+                remember_language(detected_lang)
+                logger.info("🤖 [%s] %s", detected_lang, sentence)
+                if sentence_audio:
+                    await asyncio.to_thread(send_audio, sentence_audio, turn_generation)
+            return
+
+        response_text, response_audio, detected_lang = await process_audio(wav, language=language)
+        remember_language(detected_lang)
+        logger.info("🌐 Detected language → %s", detected_lang)
+        logger.info("🤖 Reply → %s", response_text)
+        if response_audio:
+            await asyncio.to_thread(send_audio, response_audio, turn_generation)
+
+    async def timed_turn(wav, turn_generation):
+        with metrics.stage_timer("turn"), resilience.deadline():
+            await run_turn(wav, turn_generation)
+
+    def log_failure(future):
+        if future.cancelled():
+            logger.debug("Turn cancelled")
+        elif future.exception():
+            logger.error("Turn failed: %s", future.exception())
+
+    try:
+        while True:
+            message = ws.receive()
+            if not message:
+                break
+
+            # Twilio sends JSON messages, speech frames come in "media"
+            msg = json.loads(message)
+            event = msg.get("event")
+
+            if event == "start":
+                stream_sid = msg["start"].get("streamSid")
+                caller = msg["start"].get("customParameters", {}).get("from")
+                language = caller_profiles.get(caller) or "auto"
+                with state_lock:
+                    pacer = MediaPacer(ws, stream_sid)
+                media_format = msg["start"].get("mediaFormat", {})
+                encoding = media_format.get("encoding", encoding)
+                detector = UtteranceDetector(sample_rate=int(media_format.get("sampleRate", 8000)))
+
+            elif event == "media":
+                samples = decode_media_payload(msg["media"]["payload"], encoding)
+                was_speaking = detector.speaking
+                was_confirmed = was_speaking and detector.speech_ms >= MIN_UTTERANCE_MS
+                utterance = detector.push(samples)
+                if BARGE_IN and detector.speaking:
+                    if detector.speech_ms >= MIN_UTTERANCE_MS and not was_confirmed:
+                        # Long enough to become an utterance: the turn in flight is stale
+                        barge_in()
+                    elif not was_speaking:
+                        # Onset only: a click or cough is dropped by the VAD and must not cost the turn
+                        stop_playback()
+                if utterance is None:
+                    continue
 
                 # -------------------------------
-                # Select the correct TTS voice
+                # SEND COMPLETE UTTERANCE TO SARVAM (STT → LLM → TTS)
                 # -------------------------------
-                if detected_lang == "te":
-                    voice = "te-IN-Charlie"
-                elif detected_lang == "hi":
-                    voice = "hi-IN-Meera"
-                else:
-                    voice = "en-IN-Rhea"
-
-                # -------------------------------
-                # SEND TO SARVAM TTS
-                # -------------------------------
-                tts_payload = {
-                    "voice": voice,
-                    "input": f"Meeru cheppindi: {text}",
-                    "format": "wav"
-                }
-
-                tts_resp = requests.post(
-                    "https://api.sarvam.ai/text-to-speech",
-                    json=tts_payload,
-                    headers={"Authorization": f"Bearer {SARVAM_API_KEY}"}
-                ).json()
-
-                audio_reply = tts_resp["audio"]
-
-                # -------------------------------
-                # RETURN AUDIO TO TWILIO STREAM
-                # -------------------------------
-                ws.send(json.dumps({
-                    "event": "media",
-                    "media": {"payload": audio_reply}
-                }))
-
-    print("🔴 Media stream closed")
+                logger.info("👂 Utterance → %.1fs", len(utterance) / detector.sample_rate)
+                wav = pcm_to_wav(utterance, detector.sample_rate)
+                if BARGE_IN:
+                    # A turn still running for an earlier utterance is superseded
+                    barge_in()
+                with state_lock:
+                    current_turn = pipeline_runtime.submit(timed_turn(wav, generation))
+                current_turn.add_done_callback(log_failure)
+
+            elif event == "mark":
+                # Twilio finished playing a clip
+                if pacer is not None:
+                    pacer.on_mark(msg["mark"]["name"])
+
+            elif event == "stop":
+                break
+    finally:
+        if pacer is not None:
+            pacer.close()
+    logger.info("🔴 Media stream closed")
 
 
 @app.get("/")
@@ -0,0 +1,105 @@
+"""
+TTS micro-batcher - coalesces concurrent synthesis requests with the same voice settings
+into one Sarvam request using its inputs[] array
+"""
+
+import asyncio
+import logging
+import os
+import metrics
+import resilience
+
+logger = logging.getLogger(__name__)
+
+# How long the first request of a batch waits for company, and the most texts per request
+# (Sarvam caps the number of inputs per request)
+TTS_BATCH_WINDOW_MS = float(os.getenv("TTS_BATCH_WINDOW_MS", 5))
+TTS_BATCH_MAX = int(os.getenv("TTS_BATCH_MAX", 3))
+
+
+class MicroBatcher:
+    """
+    Groups items submitted under the same key within a short window
+
+    send(key, items) makes one upstream call and returns one result per item,
+    in order. A batch goes out when its window closes or when it is full.
+
+    A batch serves several turns, so it runs under the latest of their deadlines;
+    each waiter gives up on its own (result None) when its own turn runs out.
+    """
+
+    def __init__(self, send, window_ms=TTS_BATCH_WINDOW_MS, max_batch=TTS_BATCH_MAX):
+        self.send = send
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending = {}
+        self._tasks = set()
+
+    async def submit(self, key, item):
+        """Queue an item and wait for its result"""
+        if self.window <= 0 or self.max_batch <= 1:
+            return (await self.send(key, [item]))[0]
+
+        turn_deadline = resilience.current_deadline()
+        remaining = turn_deadline.remaining() if turn_deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = ([], [], [], loop.call_later(self.window, self._flush, key))
+        batch[0].append(item)
+        batch[1].append(future)
+        batch[2].append(turn_deadline)
+        if len(batch[0]) >= self.max_batch:
+            self._flush(key)
+        # A cancelled or timed-out waiter (e.g. a losing hedge) only drops its own result
+        try:
+            return await asyncio.wait_for(future, remaining)
+        except asyncio.TimeoutError:
+            logger.debug("TTS result abandoned: turn deadline passed")
+            return None
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        items, futures, deadlines, timer = batch
+        timer.cancel()
+        # Waiters cancelled while the window was open (barge-in, losing hedge) send nothing
+        live = [entry for entry in zip(items, futures, deadlines) if not entry[1].cancelled()]
+        if not live:
+            return
+        items, futures, deadlines = (list(column) for column in zip(*live))
+        # The waiter with the most time left sets the request's deadline (none if one has no turn deadline)
+        latest = None if None in deadlines else max(deadlines, key=lambda turn_deadline: turn_deadline.expires)
+        metrics.observe("voice_tts_batch_size", len(items))
+        task = asyncio.ensure_future(self._send(key, items, futures, latest))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        def abandon(_):
+            # Once nobody is waiting for any of the results, stop the request itself
+            if all(future.cancelled() for future in futures):
+                task.cancel()
+
+        for future in futures:
+            future.add_done_callback(abandon)
+
+    async def _send(self, key, items, futures, turn_deadline):
+        try:
+            with resilience.using_deadline(turn_deadline):
+                results = await self.send(key, items)
+        except Exception as e:
+            logger.error("Batch send failed: %r", e)
+            results = [None] * len(items)
+        # Every waiter gets an answer, even if the upstream returned fewer results
+        results = list(results) + [None] * (len(items) - len(results))
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+metrics.describe("voice_tts_batch_size", "Texts per Sarvam TTS request")
@@ -0,0 +1,101 @@
+"""
+Turn jobs - background pipeline turns, so /voice/process can answer Twilio immediately
+The call polls /voice/result/<job> until the turn's reply is ready
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import secrets
+import threading
+import time
+import metrics
+
+# "inline" holds the /voice/process webhook for the whole turn; "background" acks at once and polls
+TURN_MODE = os.getenv("TURN_MODE", "inline")
+
+# Jobs nobody collected within this long (caller hung up) are cancelled and dropped
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", 120))
+
+# How long one /voice/result request waits for the job before sending another pause-and-redirect
+RESULT_WAIT_SECONDS = float(os.getenv("RESULT_WAIT_SECONDS", 4))
+
+
+class TurnJobs:
+    """In-process job table: job id → (expiry, call sid, future of the turn)"""
+
+    def __init__(self, ttl_seconds=JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, future, call_sid=None):
+        """Track a turn running on the pipeline loop (a concurrent.futures.Future); returns its job id"""
+        job_id = secrets.token_urlsafe(12)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._jobs[job_id] = (now + self.ttl_seconds, call_sid, future)
+        metrics.inc("voice_turn_jobs_total", event="started")
+        return job_id
+
+    def get(self, job_id):
+        """The job's concurrent.futures.Future, or None if unknown or expired"""
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._jobs.get(job_id)
+        return entry[2] if entry else None
+
+    def wait(self, job_id, timeout=RESULT_WAIT_SECONDS):
+        """
+        Block until the job is done or the timeout passes (threaded servers)
+
+        Returns:
+            the Future if done, False if still running, None if unknown
+        """
+        future = self.get(job_id)
+        if future is None:
+            return None
+        done, _ = concurrent.futures.wait([future], timeout)
+        return future if done else False
+
+    async def wait_async(self, job_id, timeout=RESULT_WAIT_SECONDS):
+        """wait() for the async server, without blocking the event loop"""
+        future = self.get(job_id)
+        if future is None:
+            return None
+        done, _ = await asyncio.wait([asyncio.wrap_future(future)], timeout=timeout)
+        return future if done else False
+
+    def finish(self, job_id):
+        """Forget a job whose result has been delivered"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        metrics.inc("voice_turn_jobs_total", event="delivered")
+
+    def cancel_call(self, call_sid):
+        """Cancel every job of a call that has ended"""
+        with self._lock:
+            job_ids = [job_id for job_id, entry in self._jobs.items() if entry[1] == call_sid]
+            futures = [self._jobs.pop(job_id)[2] for job_id in job_ids]
+        for future in futures:
+            if future.cancel():
+                metrics.inc("voice_turn_jobs_total", event="cancelled")
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def _expire(self, now):
+        # Jobs are inserted in time order with a fixed TTL, so expired ones are at the front
+        while self._jobs:
+            job_id, entry = next(iter(self._jobs.items()))
+            if entry[0] >= now:
+                break
+            del self._jobs[job_id]
+            entry[2].cancel()
+            metrics.inc("voice_turn_jobs_total", event="expired")
+
+
+turn_jobs = TurnJobs()
+metrics.register_collector(lambda: {"voice_turn_jobs_pending": len(turn_jobs)})
+metrics.describe("voice_turn_jobs_total", "Background turn jobs by lifecycle event")
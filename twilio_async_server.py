@@ -0,0 +1,208 @@
+"""
+Async server mode for the Twilio webhooks
+Serves the same /voice/* routes as coroutines on one shared event loop (aiohttp.web),
+so a call waiting on STT → LLM → TTS does not hold a worker thread
+"""
+
+import asyncio
+import logging
+import os
+import startup
+from aiohttp import web
+import admission
+import cache_snapshot
+import metrics
+import pipeline_runtime
+from audio_store import audio_store
+from prompt_assets import build_in_background, prompt_assets
+from turn_jobs import TURN_MODE, turn_jobs
+from twilio_integration import (
+    CALL_ENDED,
+    accepted_twiml,
+    busy_twiml,
+    continue_twiml,
+    incoming_twiml,
+    language_twiml,
+    pending_twiml,
+    prerender,
+    process_twiml,
+    result_twiml,
+    start_turn,
+    start_twiml,
+)
+
+logger = logging.getLogger(__name__)
+
+routes = web.RouteTableDef()
+
+
+def twiml(response):
+    """Wrap a VoiceResponse as an aiohttp response"""
+    return web.Response(text=str(response), content_type='text/xml')
+
+
+@routes.route('*', "/voice/incoming")
+async def incoming_call(request):
+    """Handle incoming call"""
+    form = await request.post()
+    return twiml(incoming_twiml(form.get('From') or request.query.get('From')))
+
+
+@routes.post("/voice/language")
+async def select_language(request):
+    """Handle language selection"""
+    form = await request.post()
+    return twiml(language_twiml(form.get('Digits'), form.get('From')))
+
+
+@routes.route('*', "/voice/start")
+async def start_recording(request):
+    """Start recording after language selection"""
+    return twiml(start_twiml(request.query.get('lang', 'hi-IN')))
+
+
+@routes.post("/voice/process")
+async def process_recording(request):
+    """Process recorded audio"""
+    form = await request.post()
+    recording_url = form.get('RecordingUrl')
+    lang = request.query.get('lang', 'hi-IN')
+
+    if not recording_url:
+        return twiml(process_twiml(lang, None, None))
+
+    if TURN_MODE == "background":
+        # Answer the webhook now; the call polls /voice/result for the reply
+        job_id = turn_jobs.start(start_turn(form, lang), call_sid=form.get('CallSid'))
+        return twiml(accepted_twiml(job_id, lang))
+
+    try:
+        # Shielded: a retry of this webhook may be waiting on the same run
+        audio_output, response_text = await asyncio.shield(asyncio.wrap_future(start_turn(form, lang)))
+    except admission.Overloaded as e:
+        logger.warning("Overloaded: %s", e)
+        return twiml(busy_twiml(lang))
+    except Exception as e:
+        logger.error("Processing failed: %s", e)
+        audio_output = None
+        response_text = None
+
+    return twiml(process_twiml(lang, audio_output, response_text))
+
+
+@routes.route('*', "/voice/result/{job_id}")
+async def turn_result(request):
+    """Deliver a background turn's reply, or pause and poll again while it runs"""
+    job_id = request.match_info['job_id']
+    lang = request.query.get('lang', 'hi-IN')
+    future = await turn_jobs.wait_async(job_id)
+
+    if future is None:
+        # Unknown or expired job
+        return twiml(process_twiml(lang, None, None))
+    if future is False:
+        return twiml(pending_twiml(job_id, lang))
+
+    turn_jobs.finish(job_id)
+    return twiml(result_twiml(lang, future))
+
+
+@routes.get("/voice/audio/{audio_id}")
+async def serve_audio(request):
+    """Serve synthesized reply audio, with Range support"""
+    entry = audio_store.get(request.match_info['audio_id'])
+    if entry is None:
+        raise web.HTTPNotFound()
+
+    data, content_type = entry
+    headers = {'Accept-Ranges': 'bytes', 'Cache-Control': 'private, max-age=300'}
+
+    if 'Range' not in request.headers:
+        return web.Response(body=data, content_type=content_type, headers=headers)
+
+    try:
+        start, stop, _ = request.http_range.indices(len(data))
+    except ValueError:
+        start, stop = 0, 0
+    if start >= stop:
+        headers['Content-Range'] = f'bytes */{len(data)}'
+        return web.Response(status=416, headers=headers)
+
+    headers['Content-Range'] = f'bytes {start}-{stop - 1}/{len(data)}'
+    return web.Response(body=data[start:stop], status=206, content_type=content_type, headers=headers)
+
+
+@routes.get("/voice/prompts/{filename}")
+async def serve_prompt(request):
+    """Serve pre-synthesized prompt audio; names are content-hashed, so it never changes"""
+    entry = prompt_assets.get(request.match_info['filename'])
+    if entry is None:
+        raise web.HTTPNotFound()
+
+    data, etag = entry
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'public, max-age=31536000, immutable'}
+    if any(tag.value == etag for tag in request.if_none_match or ()):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=data, content_type='audio/wav', headers=headers)
+
+
+@routes.get("/metrics")
+async def metrics_endpoint(request):
+    """Prometheus-style metrics"""
+    return web.Response(text=metrics.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+
+@routes.post("/voice/continue")
+async def continue_call(request):
+    """Handle continue/end call"""
+    form = await request.post()
+    return twiml(continue_twiml(form.get('Digits'), request.query.get('lang', 'hi-IN')))
+
+
+@routes.post("/voice/status")
+async def call_status(request):
+    """Handle call status updates"""
+    form = await request.post()
+    logger.info("Call status: %s", form.get('CallStatus'))
+    if form.get('CallStatus') in CALL_ENDED:
+        # Nobody is left to hear the reply
+        turn_jobs.cancel_call(form.get('CallSid'))
+    return web.Response()
+
+
+async def on_startup(app):
+    # The server loop doubles as the pipeline runtime loop
+    pipeline_runtime.attach()
+    with startup.step("pre-render TwiML"):
+        prerender()
+    with startup.step("restore cache snapshot"):
+        cache_snapshot.start()
+    app['warm_up'] = asyncio.create_task(pipeline_runtime.warm_up())
+    app['prompt_assets'] = asyncio.create_task(build_in_background())
+    startup.preload("audio_preprocess")
+    startup.report()
+
+
+async def on_cleanup(app):
+    app['warm_up'].cancel()
+    app['prompt_assets'].cancel()
+    cache_snapshot.snapshot_writer.stop()
+    await pipeline_runtime.close()
+
+
+def create_app():
+    app = web.Application()
+    app.add_routes(routes)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main(port=None):
+    port = port or int(os.getenv("PORT", 5000))
+    print(f"\nStarting async server on port {port}...")
+    web.run_app(create_app(), host='0.0.0.0', port=port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,40 @@ Handles incoming calls and processes them through the voice pipeline
 """
 
 import asyncio
+import atexit
+import functools
 import os
-from flask import Flask, request, Response
-from twilio.twiml.voice_response import VoiceResponse
-from twilio.rest import Client
-import aiohttp
-from dotenv import load_dotenv
-from voice_pipeline import process_audio
+import logging
+import random
+import sys
+import startup
+
+# Only what answering a webhook needs is imported at boot (NumPy and friends are preloaded after)
+with startup.step("import flask"):
+    from flask import Flask, request, Response
+with startup.step("import twilio.twiml"):
+    from twilio.twiml.voice_response import VoiceResponse
+with startup.step("import aiohttp, dotenv"):
+    import aiohttp
+    from dotenv import load_dotenv
+with startup.step("import pipeline modules"):
+    from voice_pipeline import process_audio
+    from audio_store import audio_store
+    from recording_buffer import RecordingBuffer
+    from prompt_assets import PROMPTS, build_in_background, prompt_assets
+    from turn_jobs import TURN_MODE, turn_jobs
+    from caller_profiles import LANGUAGES, caller_profiles
+    from single_flight import SingleFlight
+    import admission
+    import cache_snapshot
+    import metrics
+    import pipeline_runtime
+    import resilience
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
+pipeline_runtime.configure_logging()
 
 app = Flask(__name__)
 
@@ -21,37 +46,210 @@ TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 
-# Initialize Twilio client
-if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN:
-    twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+# "play": <Play> the Sarvam TTS audio; "say": skip TTS and let Twilio <Say> the text
+PLAYBACK_MODE = os.getenv("PLAYBACK_MODE", "play")
+
+# Recordings can 404 for a moment after the <Record> callback, until Twilio finalizes them
+RECORDING_RETRIES = int(os.getenv("RECORDING_RETRIES", 4))
+RECORDING_RETRY_SECONDS = float(os.getenv("RECORDING_RETRY_SECONDS", 0.25))
+RECORDING_CHUNK_BYTES = 16 * 1024
+
+# In-flight downloads (strong references until they finish)
+_downloads = set()
+
+# One pipeline run per recording, however often Twilio retries the webhook
+turn_flights = SingleFlight("turn")
+
+# Polly voice per language for <Say>
+VOICE_MAP = {'hi-IN': 'Polly.Aditi', 'en-IN': 'Polly.Joanna', 'te-IN': 'Polly.Aditi'}
+
+# Final call statuses: background turns of these calls are cancelled
+CALL_ENDED = {'completed', 'busy', 'failed', 'no-answer', 'canceled'}
+
+# "async" serves the webhooks from twilio_async_server; "flask" is the threaded fallback
+SERVER_MODE = os.getenv("SERVER_MODE", "flask")
+
+def twiml(response):
+    """Wrap a VoiceResponse as a Flask response"""
+    return Response(str(response), mimetype='text/xml')
 
 
 async def process_audio_with_pipeline(audio_url, language="auto"):
-    """Process audio through voice pipeline"""
+    """
+    Process audio through voice pipeline
     
-    # Download audio from Twilio
-    async with aiohttp.ClientSession() as session:
-        async with session.get(audio_url, auth=aiohttp.BasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)) as response:
-            if response.status != 200:
-                return None, "Error downloading audio"
-            
-            audio_data = await response.read()
+    Raises:
+        admission.Overloaded: the worker is too busy; answer with the high-call-volume prompt
+    """
     
-    # Process through unified pipeline
-    response_text, audio_output, detected_lang = await process_audio(audio_data, language=language)
+    # Under load, trade quality for staying inside Twilio's webhook deadline
+    level = admission.degradation_level()
+    if level != admission.NORMAL:
+        metrics.inc("voice_degraded_turns_total", level=admission.LEVEL_NAMES[level])
+    if level >= admission.SHED:
+        raise admission.Overloaded("shedding turns")
     
-    if audio_output:
-        return audio_output, response_text
+    # The whole turn shares one deadline, split across download / STT / LLM / TTS
+    with metrics.stage_timer("turn"), resilience.deadline(), admission.turn():
+        # Streams in while STT is already uploading it (or is buffered whole for preprocessing)
+        audio_data = await download_recording(audio_url)
+        
+        response_text, audio_output = None, None
+        if audio_data is not None:
+            # Say mode (or load) means Twilio speaks the reply, so skip TTS
+            response_text, audio_output, detected_lang = await process_audio(
+                audio_data,
+                language=language,
+                synthesize=PLAYBACK_MODE == "play" and level < admission.SAY_ONLY,
+                cached_only=level >= admission.CACHED_ONLY,
+            )
     
-    return None, "Processing error"
+    if not response_text and (level >= admission.CACHED_ONLY or admission.degradation_level() != admission.NORMAL):
+        # A failure under load is most likely the load itself
+        raise admission.Overloaded("no reply under load")
+    
+    return audio_output, response_text
 
 
-@app.route("/voice/incoming", methods=['GET', 'POST'])
-def incoming_call():
-    """Handle incoming call"""
-    print(f"Incoming call received! Method: {request.method}")
-    print(f"Headers: {dict(request.headers)}")
+def start_turn(form, lang):
+    """
+    Start the pipeline for a <Record> callback, or join the run already started for
+    the same recording (Twilio retry or fallback)
+    
+    Returns:
+        concurrent.futures.Future of (audio_output, response_text)
+    """
+    recording_url = form.get('RecordingUrl')
+    key = (form.get('CallSid'), form.get('RecordingSid') or recording_url)
+    return turn_flights.submit(
+        key, lambda: pipeline_runtime.submit(process_audio_with_pipeline(recording_url + '.wav', language=lang))
+    )
+
+
+async def download_recording(audio_url):
+    """
+    Start downloading a recording from Twilio over the pooled keep-alive session
     
+    Returns once the response headers are in; the body keeps arriving in the
+    returned RecordingBuffer, so the STT upload can start straight away.
+    
+    Returns:
+        RecordingBuffer, or None if the recording could not be fetched
+    """
+    buffer = RecordingBuffer()
+    ready = asyncio.get_running_loop().create_future()
+    task = asyncio.ensure_future(_download(audio_url, buffer, ready))
+    _downloads.add(task)
+    task.add_done_callback(_downloads.discard)
+    return buffer if await ready else None
+
+
+async def _download(audio_url, buffer, ready):
+    error = None
+    try:
+        async with admission.slot("download"):
+            session = pipeline_runtime.get_session("twilio")
+            with metrics.stage_timer("download"):
+                response = await _get_when_ready(session, audio_url)
+                async with response:
+                    if response.status != 200:
+                        logger.error("Recording download failed: %s", response.status)
+                        error = RuntimeError(f"recording download failed: {response.status}")
+                        return
+                    
+                    ready.set_result(True)
+                    async for chunk in response.content.iter_chunked(RECORDING_CHUNK_BYTES):
+                        await buffer.append(chunk)
+        metrics.observe("voice_payload_bytes", buffer.size, payload="recording")
+    except resilience.Unavailable as e:
+        metrics.inc("voice_upstream_responses_total", endpoint="recording", status=e.status)
+        logger.warning("Recording download skipped: %s", e)
+        error = e
+    except Exception as e:
+        resilience.record("download")
+        metrics.inc("voice_upstream_responses_total", endpoint="recording", status="error")
+        logger.error("Recording download error: %r", e)
+        error = e
+    finally:
+        if not ready.done():
+            ready.set_result(error is None)
+        if error is None:
+            await buffer.finish()
+        else:
+            await buffer.fail(error)
+
+
+async def _get_when_ready(session, audio_url):
+    """GET the recording, retrying with backoff while Twilio still answers 404 (not finalized yet)"""
+    auth = aiohttp.BasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    for attempt in range(RECORDING_RETRIES + 1):
+        timeout = aiohttp.ClientTimeout(total=resilience.stage_timeout("download"))
+        response = await session.get(audio_url, auth=auth, timeout=timeout)
+        metrics.inc("voice_upstream_responses_total", endpoint="recording", status=response.status)
+        resilience.record("download", response.status)
+        if response.status != 404 or attempt == RECORDING_RETRIES:
+            return response
+        response.release()
+        metrics.inc("voice_recording_retries_total")
+        await asyncio.sleep(RECORDING_RETRY_SECONDS * 2 ** attempt * random.uniform(0.8, 1.2))
+
+
+def speak(verb, prompt_id, lang):
+    """Add a fixed prompt: <Play> its pre-synthesized audio, or <Say> it until that is built"""
+    texts = PROMPTS[prompt_id]
+    if lang not in texts:
+        lang = 'hi-IN'
+    url = prompt_assets.url(prompt_id, lang)
+    if url:
+        verb.play(url)
+    else:
+        verb.say(texts[lang], voice=VOICE_MAP.get(lang, 'Polly.Aditi'), language=lang)
+
+
+def static_twiml(builder):
+    """
+    Cache a builder whose TwiML depends only on its arguments and the prompt assets
+    
+    The decorated builder returns the rendered string; prerender() fills the cache at boot.
+    """
+    cache = {}
+    
+    @functools.wraps(builder)
+    def render(*args, **kwargs):
+        key = (prompt_assets.version, args, tuple(sorted(kwargs.items())))
+        text = cache.get(key)
+        if text is None:
+            if len(cache) >= 256:
+                # Stale asset versions or junk digits; re-render on demand
+                cache.clear()
+            text = cache[key] = str(builder(*args, **kwargs))
+        return text
+    
+    return render
+
+
+def prerender():
+    """Render the static TwiML documents for every language, so no webhook builds them on a cold path"""
+    menu_twiml()
+    for lang in LANGUAGES:
+        start_twiml(lang)
+        start_twiml(lang, returning=True)
+        busy_twiml(lang)
+        continue_twiml('1', lang)
+        continue_twiml('2', lang)
+
+
+def incoming_twiml(caller=None):
+    """TwiML for a new call: straight to the greeting for a known caller, otherwise the language menu"""
+    language = caller_profiles.get(caller)
+    if language:
+        return start_twiml(language, returning=True)
+    return menu_twiml()
+
+
+@static_twiml
+def menu_twiml():
+    """TwiML for the language menu"""
     response = VoiceResponse()
     
     # Language selection
@@ -63,24 +261,24 @@ def incoming_call():
     )
     
     # Multi-language welcome
-    gather.say("Welcome to electricity department.", voice='Polly.Joanna', language='en-IN')
-    gather.say("Press 1 for Hindi.", voice='Polly.Joanna', language='en-IN')
-    gather.say("हिंदी के लिए 1 दबाएं।", voice='Polly.Aditi', language='hi-IN')
-    gather.say("Press 2 for English.", voice='Polly.Joanna', language='en-IN')
-    gather.say("अंग्रेजी के लिए 2 दबाएं।", voice='Polly.Aditi', language='hi-IN')
-    gather.say("Press 3 for Telugu.", voice='Polly.Joanna', language='en-IN')
-    gather.say("తెలుగు కోసం 3 నొక్కండి.", voice='Polly.Aditi', language='te-IN')
+    speak(gather, "welcome", 'en-IN')
+    speak(gather, "menu_hindi", 'en-IN')
+    speak(gather, "menu_hindi", 'hi-IN')
+    speak(gather, "menu_english", 'en-IN')
+    speak(gather, "menu_english", 'hi-IN')
+    speak(gather, "menu_telugu", 'en-IN')
+    speak(gather, "menu_telugu", 'te-IN')
     
     # Default to Hindi if no input
     response.redirect('/voice/start?lang=hi-IN')
     
-    return Response(str(response), mimetype='text/xml')
+    return response
 
 
-@app.route("/voice/language", methods=['POST'])
-def select_language():
-    """Handle language selection"""
-    digit = request.form.get('Digits')
+def language_twiml(digit, caller=None):
+    """TwiML for a language menu choice (9 from a returning caller's greeting reopens the menu)"""
+    if digit == '9':
+        return menu_twiml()
     
     # Map digit to language
     lang_map = {
@@ -90,38 +288,34 @@ def select_language():
     }
     
     selected_lang = lang_map.get(digit, 'hi-IN')
+    if digit in lang_map:
+        # Next call skips the menu
+        caller_profiles.remember(caller, selected_lang)
     
     response = VoiceResponse()
     response.redirect(f'/voice/start?lang={selected_lang}')
     
-    return Response(str(response), mimetype='text/xml')
+    return response
 
 
-@app.route("/voice/start", methods=['GET', 'POST'])
-def start_recording():
-    """Start recording after language selection"""
-    lang = request.args.get('lang', 'hi-IN')
-    
+@static_twiml
+def start_twiml(lang, returning=False):
+    """TwiML that greets the caller in their language and records the issue"""
     response = VoiceResponse()
     
-    # Welcome message in selected language
-    messages = {
-        'hi-IN': "नमस्ते, बिजली विभाग में आपका स्वागत है। कृपया अपनी समस्या बताएं।",
-        'en-IN': "Hello, welcome to electricity department. Please tell us your issue.",
-        'te-IN': "నమస్కారం, విద్యుత్ విభాగానికి స్వాగతం. దయచేసి మీ సమస్యను చెప్పండి."
-    }
-    
-    voice_map = {
-        'hi-IN': 'Polly.Aditi',
-        'en-IN': 'Polly.Joanna',
-        'te-IN': 'Polly.Aditi'
-    }
-    
-    response.say(
-        messages.get(lang, messages['hi-IN']),
-        voice=voice_map.get(lang, 'Polly.Aditi'),
-        language=lang
-    )
+    if returning:
+        # Remembered language: a short window to press 9 for the menu instead
+        gather = response.gather(
+            action='/voice/language',
+            method='POST',
+            num_digits=1,
+            timeout=1
+        )
+        speak(gather, "greeting", lang)
+        speak(gather, "change_language", lang)
+    else:
+        # Welcome message in selected language
+        speak(response, "greeting", lang)
     
     # Record user input with language parameter
     response.record(
@@ -132,94 +326,94 @@ def start_recording():
         transcribe=False
     )
     
-    return Response(str(response), mimetype='text/xml')
+    return response
 
 
-@app.route("/voice/process", methods=['POST'])
-def process_recording():
-    """Process recorded audio"""
-    recording_url = request.form.get('RecordingUrl')
-    lang = request.args.get('lang', 'hi-IN')
-    
-    if not recording_url:
-        response = VoiceResponse()
-        error_msg = {
-            'hi-IN': "माफ़ कीजिए, कोई समस्या हुई। कृपया दोबारा कॉल करें।",
-            'en-IN': "Sorry, there was an issue. Please call again.",
-            'te-IN': "క్షమించండి, సమస్య వచ్చింది. దయచేసి మళ్లీ కాల్ చేయండి."
-        }
-        voice_map = {'hi-IN': 'Polly.Aditi', 'en-IN': 'Polly.Joanna', 'te-IN': 'Polly.Aditi'}
-        response.say(error_msg.get(lang, error_msg['hi-IN']), voice=voice_map.get(lang), language=lang)
-        return Response(str(response), mimetype='text/xml')
-    
-    # Process audio through pipeline with selected language
-    try:
-        audio_output, response_text = asyncio.run(process_audio_with_pipeline(recording_url + '.wav', language=lang))
-    except Exception as e:
-        print(f"[ERROR] Processing failed: {e}")
-        audio_output = None
-        response_text = None
-    
+def process_twiml(lang, audio_output, response_text):
+    """TwiML that plays (or says) the pipeline reply and offers more help"""
     response = VoiceResponse()
-    voice_map = {'hi-IN': 'Polly.Aditi', 'en-IN': 'Polly.Joanna', 'te-IN': 'Polly.Aditi'}
     
-    if audio_output and response_text:
-        # Use Twilio's Say with the text response
-        response.say(response_text, voice=voice_map.get(lang), language=lang)
+    if response_text:
+        if audio_output:
+            # Play the Sarvam TTS audio we already synthesized
+            audio_id = audio_store.put(audio_output, "audio/wav")
+            response.play(f'/voice/audio/{audio_id}')
+        else:
+            # Say mode (or TTS failed): let Twilio speak the text
+            response.say(response_text, voice=VOICE_MAP.get(lang), language=lang)
         
         # Ask if they need more help
-        continue_msg = {
-            'hi-IN': "क्या आपको और मदद चाहिए? हाँ के लिए 1 दबाएं, नहीं के लिए 2 दबाएं।",
-            'en-IN': "Do you need more help? Press 1 for yes, 2 for no.",
-            'te-IN': "మీకు మరింత సహాయం కావాలా? అవును కోసం 1, కాదు కోసం 2 నొక్కండి."
-        }
         gather = response.gather(
             action=f'/voice/continue?lang={lang}',
             method='POST',
             num_digits=1,
             timeout=5
         )
-        gather.say(continue_msg.get(lang), voice=voice_map.get(lang), language=lang)
+        speak(gather, "more_help", lang)
     else:
-        error_msg = {
-            'hi-IN': "माफ़ कीजिए, कोई समस्या हुई। कृपया दोबारा कॉल करें।",
-            'en-IN': "Sorry, there was an issue. Please call again.",
-            'te-IN': "క్షమించండి, సమస్య వచ్చింది. దయచేసి మళ్లీ కాల్ చేయండి."
-        }
-        response.say(error_msg.get(lang), voice=voice_map.get(lang), language=lang)
+        speak(response, "error", lang)
     
-    return Response(str(response), mimetype='text/xml')
+    return response
 
 
-@app.route("/voice/continue", methods=['POST'])
-def continue_call():
-    """Handle continue/end call"""
-    digits = request.form.get('Digits')
-    lang = request.args.get('lang', 'hi-IN')
+def accepted_twiml(job_id, lang):
+    """TwiML for a turn running in the background: a short filler, then poll for the reply"""
+    response = VoiceResponse()
+    speak(response, "one_moment", lang)
+    response.redirect(f'/voice/result/{job_id}?lang={lang}', method='POST')
     
+    return response
+
+
+def pending_twiml(job_id, lang):
+    """TwiML for a background turn that is still running: a short pause, then poll again"""
     response = VoiceResponse()
+    response.pause(length=1)
+    response.redirect(f'/voice/result/{job_id}?lang={lang}', method='POST')
     
-    voice_map = {
-        'hi-IN': 'Polly.Aditi',
-        'en-IN': 'Polly.Joanna',
-        'te-IN': 'Polly.Aditi'
-    }
+    return response
+
+
+def result_twiml(lang, future):
+    """TwiML for a finished background turn (its future from turn_jobs)"""
+    if future.cancelled():
+        return process_twiml(lang, None, None)
+    try:
+        audio_output, response_text = future.result()
+    except admission.Overloaded as e:
+        logger.warning("Overloaded: %s", e)
+        return busy_twiml(lang)
+    except Exception as e:
+        logger.error("Processing failed: %s", e)
+        audio_output = None
+        response_text = None
     
-    continue_msg = {
-        'hi-IN': "कृपया अपनी समस्या बताएं।",
-        'en-IN': "Please tell us your issue.",
-        'te-IN': "దయచేసి మీ సమస్యను చెప్పండి."
-    }
+    return process_twiml(lang, audio_output, response_text)
+
+
+@static_twiml
+def busy_twiml(lang):
+    """TwiML for an overloaded worker: high-call-volume notice, then the usual "more help?" menu"""
+    response = VoiceResponse()
+    gather = response.gather(
+        action=f'/voice/continue?lang={lang}',
+        method='POST',
+        num_digits=1,
+        timeout=5
+    )
+    speak(gather, "busy", lang)
     
-    goodbye_msg = {
-        'hi-IN': "धन्यवाद। आपका दिन शुभ हो।",
-        'en-IN': "Thank you. Have a good day.",
-        'te-IN': "ధన్యవాదాలు. మంచి రోజు కలగాలి."
-    }
+    return response
+
+
+@static_twiml
+def continue_twiml(digits, lang):
+    """TwiML for the "need more help?" answer"""
+    response = VoiceResponse()
     
     if digits == '1':
         # Continue - record again
-        response.say(continue_msg.get(lang), voice=voice_map.get(lang), language=lang)
+        speak(response, "tell_issue", lang)
         response.record(
             action=f'/voice/process?lang={lang}',
             method='POST',
@@ -229,17 +423,132 @@ def continue_call():
         )
     else:
         # End call
-        response.say(goodbye_msg.get(lang), voice=voice_map.get(lang), language=lang)
+        speak(response, "goodbye", lang)
         response.hangup()
     
-    return Response(str(response), mimetype='text/xml')
+    return response
+
+
+@app.route("/voice/incoming", methods=['GET', 'POST'])
+def incoming_call():
+    """Handle incoming call"""
+    logger.info("Incoming call received! Method: %s", request.method)
+    
+    return twiml(incoming_twiml(request.values.get('From')))
+
+
+@app.route("/voice/language", methods=['POST'])
+def select_language():
+    """Handle language selection"""
+    return twiml(language_twiml(request.form.get('Digits'), request.form.get('From')))
+
+
+@app.route("/voice/start", methods=['GET', 'POST'])
+def start_recording():
+    """Start recording after language selection"""
+    return twiml(start_twiml(request.args.get('lang', 'hi-IN')))
+
+
+@app.route("/voice/process", methods=['POST'])
+def process_recording():
+    """Process recorded audio"""
+    recording_url = request.form.get('RecordingUrl')
+    lang = request.args.get('lang', 'hi-IN')
+    
+    if not recording_url:
+        return twiml(process_twiml(lang, None, None))
+    
+    if TURN_MODE == "background":
+        # Answer the webhook now; the call polls /voice/result for the reply
+        job_id = turn_jobs.start(start_turn(request.form, lang), call_sid=request.form.get('CallSid'))
+        return twiml(accepted_twiml(job_id, lang))
+    
+    # Process audio through pipeline with selected language
+    try:
+        audio_output, response_text = start_turn(request.form, lang).result()
+    except admission.Overloaded as e:
+        logger.warning("Overloaded: %s", e)
+        return twiml(busy_twiml(lang))
+    except Exception as e:
+        logger.error("Processing failed: %s", e)
+        audio_output = None
+        response_text = None
+    
+    return twiml(process_twiml(lang, audio_output, response_text))
+
+
+@app.route("/voice/result/<job_id>", methods=['GET', 'POST'])
+def turn_result(job_id):
+    """Deliver a background turn's reply, or pause and poll again while it runs"""
+    lang = request.args.get('lang', 'hi-IN')
+    future = turn_jobs.wait(job_id)
+    
+    if future is None:
+        # Unknown or expired job
+        return twiml(process_twiml(lang, None, None))
+    if future is False:
+        return twiml(pending_twiml(job_id, lang))
+    
+    turn_jobs.finish(job_id)
+    return twiml(result_twiml(lang, future))
+
+
+@app.route("/voice/audio/<audio_id>", methods=['GET', 'HEAD'])
+def serve_audio(audio_id):
+    """Serve synthesized reply audio, with Range support"""
+    entry = audio_store.get(audio_id)
+    if entry is None:
+        return '', 404
+    
+    data, content_type = entry
+    headers = {'Accept-Ranges': 'bytes', 'Cache-Control': 'private, max-age=300'}
+    
+    if request.range is None:
+        return Response(data, mimetype=content_type, headers=headers)
+    
+    byte_range = request.range.range_for_length(len(data))
+    if byte_range is None:
+        headers['Content-Range'] = f'bytes */{len(data)}'
+        return Response(status=416, headers=headers)
+    
+    start, stop = byte_range
+    headers['Content-Range'] = f'bytes {start}-{stop - 1}/{len(data)}'
+    return Response(data[start:stop], status=206, mimetype=content_type, headers=headers)
+
+
+@app.route("/voice/prompts/<filename>", methods=['GET', 'HEAD'])
+def serve_prompt(filename):
+    """Serve pre-synthesized prompt audio; names are content-hashed, so it never changes"""
+    entry = prompt_assets.get(filename)
+    if entry is None:
+        return '', 404
+    
+    data, etag = entry
+    response = Response(data, mimetype='audio/wav', headers={'Cache-Control': 'public, max-age=31536000, immutable'})
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@app.route("/metrics", methods=['GET'])
+def metrics_endpoint():
+    """Prometheus-style metrics"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route("/voice/continue", methods=['POST'])
+def continue_call():
+    """Handle continue/end call"""
+    return twiml(continue_twiml(request.form.get('Digits'), request.args.get('lang', 'hi-IN')))
 
 
 @app.route("/voice/status", methods=['POST'])
 def call_status():
     """Handle call status updates"""
     call_status = request.form.get('CallStatus')
-    print(f"Call status: {call_status}")
+    logger.info("Call status: %s", call_status)
+    if call_status in CALL_ENDED:
+        # Nobody is left to hear the reply
+        turn_jobs.cancel_call(request.form.get('CallSid'))
     return '', 200
 
 
@@ -248,7 +557,26 @@ if __name__ == "__main__":
     print("="*60)
     print("TWILIO VOICE INTEGRATION")
     print("="*60)
-    print(f"\nStarting Flask server on port {port}...")
-    print("="*60)
     
-    app.run(host='0.0.0.0', port=port, debug=False)
+    if SERVER_MODE == "async":
+        # Async-native server: every in-flight call is a coroutine on one loop.
+        # It imports this module by name; reuse this copy rather than executing it a second time
+        sys.modules.setdefault("twilio_integration", sys.modules[__name__])
+        import twilio_async_server
+        twilio_async_server.main(port)
+    else:
+        print(f"\nStarting Flask server on port {port}...")
+        print("="*60)
+        
+        with startup.step("pre-render TwiML"):
+            prerender()
+        with startup.step("restore cache snapshot"):
+            cache_snapshot.start()
+        atexit.register(cache_snapshot.snapshot_writer.stop)
+        # One event loop and warm connection pools for the life of the worker
+        pipeline_runtime.start()
+        pipeline_runtime.submit(build_in_background())
+        startup.preload("audio_preprocess")
+        startup.report()
+        
+        app.run(host='0.0.0.0', port=port, debug=False)
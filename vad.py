@@ -0,0 +1,121 @@
+"""
+Voice activity detection and utterance endpointing for Media Streams audio
+Energy + zero-crossing VAD with onset/hangover timers over a per-call ring buffer
+"""
+
+import os
+from collections import deque
+import numpy as np
+
+ENDPOINT_SILENCE_MS = int(os.getenv("VAD_ENDPOINT_SILENCE_MS", 700))
+MAX_UTTERANCE_MS = int(os.getenv("VAD_MAX_UTTERANCE_MS", 15000))
+MIN_UTTERANCE_MS = int(os.getenv("VAD_MIN_UTTERANCE_MS", 250))
+ONSET_MS = int(os.getenv("VAD_ONSET_MS", 60))
+PRE_ROLL_MS = int(os.getenv("VAD_PRE_ROLL_MS", 200))
+MIN_ENERGY_DB = float(os.getenv("VAD_MIN_ENERGY_DB", -45))
+NOISE_MARGIN_DB = float(os.getenv("VAD_NOISE_MARGIN_DB", 10))
+MAX_ZCR = float(os.getenv("VAD_MAX_ZCR", 0.35))
+
+
+def frame_energy_db(samples):
+    """RMS level of int16 samples in dBFS"""
+    if len(samples) == 0:
+        return -120.0
+    x = samples.astype(np.float32)
+    rms = np.sqrt(np.mean(x * x)) / 32768.0
+    return 20.0 * np.log10(rms + 1e-9)
+
+
+def zero_crossing_rate(samples):
+    """Fraction of adjacent sample pairs that change sign"""
+    if len(samples) < 2:
+        return 0.0
+    signs = np.signbit(samples)
+    return np.count_nonzero(signs[1:] != signs[:-1]) / (len(samples) - 1)
+
+
+class UtteranceDetector:
+    """
+    Per-call endpointer: feed decoded PCM frames, get back complete utterances
+
+    Frames are kept in a ring buffer. While idle it only holds a short
+    pre-roll so the start of a word is not clipped; once speech has been
+    seen for ONSET_MS the buffer grows until ENDPOINT_SILENCE_MS of silence
+    (the hangover) or MAX_UTTERANCE_MS is reached.
+    """
+
+    def __init__(self, sample_rate, endpoint_silence_ms=None, max_utterance_ms=None):
+        self.sample_rate = sample_rate
+        self.endpoint_silence_ms = endpoint_silence_ms or ENDPOINT_SILENCE_MS
+        self.max_utterance_ms = max_utterance_ms or MAX_UTTERANCE_MS
+        self.noise_floor_db = MIN_ENERGY_DB - NOISE_MARGIN_DB
+        self.frames = deque()
+        self.reset()
+
+    def reset(self):
+        """Drop buffered audio and return to the idle state"""
+        self.frames.clear()
+        self.buffered_ms = 0.0
+        self.in_speech = False
+        self.speech_ms = 0.0
+        self.onset_ms = 0.0
+        self.silence_ms = 0.0
+
+    def is_speech(self, samples):
+        """Classify one frame and adapt the noise floor on non-speech frames"""
+        energy = frame_energy_db(samples)
+        threshold = max(MIN_ENERGY_DB, self.noise_floor_db + NOISE_MARGIN_DB)
+        speech = energy >= threshold and zero_crossing_rate(samples) <= MAX_ZCR
+        if not speech:
+            # Slow exponential average so the floor tracks line noise, not speech tails
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * energy
+        return speech
+
+    def push(self, samples):
+        """
+        Add one frame of int16 samples
+
+        Returns:
+            numpy int16 array with a complete utterance, or None
+        """
+        frame_ms = 1000.0 * len(samples) / self.sample_rate
+        speech = self.is_speech(samples)
+        self.frames.append(samples)
+        self.buffered_ms += frame_ms
+
+        if not self.in_speech:
+            self.onset_ms = self.onset_ms + frame_ms if speech else 0.0
+            if self.onset_ms >= ONSET_MS:
+                self.in_speech = True
+                self.speech_ms = self.onset_ms
+                self.silence_ms = 0.0
+            else:
+                self._trim_pre_roll()
+            return None
+
+        if speech:
+            self.speech_ms += frame_ms
+            self.silence_ms = 0.0
+        else:
+            self.silence_ms += frame_ms
+
+        if self.silence_ms >= self.endpoint_silence_ms or self.buffered_ms >= self.max_utterance_ms:
+            return self._flush()
+        return None
+
+    @property
+    def speaking(self):
+        """True while the caller is mid-utterance"""
+        return self.in_speech
+
+    def _trim_pre_roll(self):
+        while self.frames and self.buffered_ms - 1000.0 * len(self.frames[0]) / self.sample_rate >= PRE_ROLL_MS:
+            self.buffered_ms -= 1000.0 * len(self.frames.popleft()) / self.sample_rate
+
+    def _flush(self):
+        speech_ms = self.speech_ms
+        utterance = np.concatenate(self.frames) if self.frames else None
+        self.reset()
+        if utterance is None or speech_ms < MIN_UTTERANCE_MS:
+            return None
+        return utterance
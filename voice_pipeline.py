@@ -4,21 +4,63 @@ Supports Hindi, Telugu, and auto-detection
 """
 
 import asyncio
+import logging
 import os
 import base64
+import json
+import time
 import aiohttp
 from dotenv import load_dotenv
 
 load_dotenv()
 
+import metrics
+import admission
+import pipeline_runtime
+import resilience
+import local_intents
+import speech_text
+from corrections import corrections
+from recording_buffer import RecordingBuffer
+from response_cache import response_cache
+from tts_batcher import MicroBatcher
 
-async def process_audio(audio_data, language="auto"):
+logger = logging.getLogger(__name__)
+
+SARVAM_BASE_URL = pipeline_runtime.UPSTREAMS["sarvam"]
+
+# Auto-detection: candidate STT languages and the native-script share that ends detection early
+AUTO_DETECT_LANGUAGES = [
+    lang.strip() for lang in os.getenv("AUTO_DETECT_LANGUAGES", "hi-IN,te-IN,en-IN").split(",") if lang.strip()
+]
+AUTO_DETECT_CONFIDENCE = float(os.getenv("AUTO_DETECT_CONFIDENCE", 0.8))
+# An early pick must also outscore every other transcript received so far by this factor
+AUTO_DETECT_MARGIN = float(os.getenv("AUTO_DETECT_MARGIN", 1.5))
+
+TTS_SPEAKER = "anushka"
+TTS_MODEL = "bulbul:v2"
+
+# Stream LLM output and synthesize it sentence by sentence where the caller supports it
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+# Replies are one or two spoken sentences; the cap keeps generation time predictable
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", 200))
+
+# Unicode block of each language's native script
+SCRIPT_RANGES = {
+    "hi-IN": ('\u0900', '\u097F'),
+    "te-IN": ('\u0C00', '\u0C7F'),
+}
+
+
+async def process_audio(audio_data, language="auto", synthesize=True, cached_only=False):
     """
     Process audio through complete pipeline
     
     Args:
-        audio_data: Audio bytes (WAV format)
+        audio_data: Audio bytes (WAV format), or a RecordingBuffer still being downloaded
         language: "hi-IN" (Hindi), "te-IN" (Telugu), or "auto" (detect)
+        synthesize: Run TTS; when False the reply audio is None (caller speaks the text itself)
+        cached_only: Answer only from the response cache (no LLM / TTS calls); a miss returns no reply
     
     Returns:
         tuple: (response_text, response_audio_bytes, detected_language)
@@ -27,19 +69,7 @@ async def process_audio(audio_data, language="auto"):
     api_key = os.getenv("SARVAM_API_KEY")
     
     # Step 1: Speech-to-Text
-    print(f"[DEBUG] Input language parameter: {language}")
-    if language == "auto":
-        # Try multiple languages and pick best
-        transcript, detected_lang = await auto_detect_language(audio_data, api_key)
-    else:
-        # Workaround: Sarvam AI doesn't support te-IN STT, use hi-IN for Telugu
-        stt_language = "hi-IN" if language == "te-IN" else language
-        print(f"[DEBUG] Using STT language: {stt_language} (requested: {language})")
-        transcript = await speech_to_text(audio_data, stt_language, api_key)
-        detected_lang = language  # Keep the original language for response
-    
-    print(f"[DEBUG] Detected/Selected language: {detected_lang}")
-    print(f"[DEBUG] Transcript: {transcript}")
+    transcript, detected_lang = await transcribe(audio_data, language, api_key)
     
     if not transcript:
         return None, None, None
@@ -47,66 +77,293 @@ async def process_audio(audio_data, language="auto"):
     # Apply corrections
     transcript = apply_corrections(transcript, detected_lang)
     
-    # Step 2: Language Model
-    print(f"[DEBUG] Generating response in language: {detected_lang}")
-    response_text = await generate_response(transcript, detected_lang, api_key)
+    # Outage questions about a known area are answered from local data, before the
+    # response cache (whose LLM replies do not follow the live outage status)
+    local_text = local_intents.answer(transcript, detected_lang)
+    if local_text:
+        local_audio = await local_reply_audio(local_text, detected_lang, api_key, synthesize, cached_only)
+        return local_text, local_audio, detected_lang
+    
+    # Repeat questions skip the LLM and TTS round trips
+    cached = response_cache.get(transcript, detected_lang)
+    if cached and (cached[1] or not synthesize):
+        logger.debug("Response cache hit")
+        return cached[0], cached[1], detected_lang
+    
+    if cached_only:
+        if cached:
+            return cached[0], None, detected_lang
+        return None, None, detected_lang
+    
+    if cached:
+        # Text cached by a Say-mode turn; only the audio is missing
+        response_text = cached[0]
+    else:
+        # Step 2: Language Model
+        logger.debug("Generating response in language: %s", detected_lang)
+        response_text = await generate_response(transcript, detected_lang, api_key)
     
     if not response_text:
         return None, None, None
     
-    print(f"[DEBUG] Generated response: {response_text}")
+    logger.debug("Generated response: %s", response_text)
+    
+    if not synthesize:
+        response_cache.put(transcript, detected_lang, response_text)
+        return response_text, None, detected_lang
     
     # Apply TTS corrections
     tts_text = apply_tts_corrections(response_text, detected_lang)
     
-    # Truncate if too long
-    if len(tts_text) > 500:
-        tts_text = tts_text[:497] + "..."
+    # Whole sentences within the TTS budget
+    tts_text = speech_text.fit(tts_text, speech_text.budget(detected_lang))
     
     # Step 3: Text-to-Speech
     response_audio = await text_to_speech(tts_text, detected_lang, api_key)
     
+    if response_audio:
+        response_cache.put(transcript, detected_lang, response_text, response_audio)
+    
     return response_text, response_audio, detected_lang
 
 
+async def process_audio_stream(audio_data, language="auto"):
+    """
+    Process audio through the pipeline, streaming the reply sentence by sentence
+    
+    The LLM reply is consumed as it is generated; every finished sentence is
+    sent to TTS right away, so the first audio is ready after the first
+    sentence rather than after the whole reply.
+    
+    Yields:
+        tuple: (sentence_text, sentence_audio_bytes, detected_language), in reply order
+    """
+    
+    api_key = os.getenv("SARVAM_API_KEY")
+    
+    transcript, detected_lang = await transcribe(audio_data, language, api_key)
+    
+    if not transcript:
+        return
+    
+    transcript = apply_corrections(transcript, detected_lang)
+    
+    local_text = local_intents.answer(transcript, detected_lang)
+    if local_text:
+        yield local_text, await local_reply_audio(local_text, detected_lang, api_key), detected_lang
+        return
+    
+    cached = response_cache.get(transcript, detected_lang)
+    if cached and cached[1]:
+        logger.debug("Response cache hit")
+        yield cached[0], cached[1], detected_lang
+        return
+    
+    # Sentences (with their in-flight TTS task) in reply order; None marks the end
+    pending = asyncio.Queue()
+    
+    async def produce():
+        splitter = SentenceSplitter()
+        limit = budget = speech_text.budget(detected_lang)
+        
+        def enqueue(sentence):
+            nonlocal budget
+            tts_text = apply_tts_corrections(sentence, detected_lang)
+            if len(tts_text) > budget:
+                if budget < limit:
+                    # Stop after the last whole sentence that fits
+                    return False
+                # Only a first sentence that is too long on its own is cut (at a word)
+                tts_text = speech_text.fit(tts_text, budget)
+            budget -= len(tts_text)
+            tts_task = asyncio.ensure_future(text_to_speech(tts_text, detected_lang, api_key))
+            pending.put_nowait((sentence, tts_task))
+            return True
+        
+        outcome = {}
+        try:
+            async for delta in generate_response_stream(transcript, detected_lang, api_key, outcome):
+                if not all(enqueue(sentence) for sentence in splitter.feed(delta)):
+                    break
+            else:
+                tail = splitter.flush()
+                if outcome.get("finish_reason") == "length" and budget < limit:
+                    # Cut off by max_tokens: speak only the finished sentences (as whole_sentences does)
+                    logger.debug("Dropped unfinished sentence: %s", tail)
+                else:
+                    for sentence in tail:
+                        enqueue(sentence)
+        finally:
+            pending.put_nowait(None)
+    
+    producer = asyncio.ensure_future(produce())
+    in_flight = []
+    try:
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            sentence, tts_task = item
+            in_flight.append(tts_task)
+            sentence_audio = await tts_task
+            logger.debug("Streamed sentence: %s", sentence)
+            yield sentence, sentence_audio, detected_lang
+        await producer
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item is not None:
+                in_flight.append(item[1])
+        for tts_task in in_flight:
+            tts_task.cancel()
+
+
+async def local_reply_audio(reply, language, api_key, synthesize=True, cached_only=False):
+    """
+    Audio for a local intent reply, cached by the reply text itself
+    
+    Every caller asking about the same area gets the same sentence, so after the
+    first one it is a cache hit; a status change produces new text and new audio.
+    """
+    if not synthesize:
+        return None
+    cache_language = f"local:{language}"
+    cached = response_cache.get(reply, cache_language)
+    if cached and cached[1]:
+        return cached[1]
+    if cached_only:
+        return None
+    audio = await text_to_speech(apply_tts_corrections(reply, language), language, api_key)
+    if audio:
+        response_cache.put(reply, cache_language, reply, audio)
+    return audio
+
+
+async def transcribe(audio_data, language, api_key):
+    """
+    Speech-to-Text step shared by the pipelines
+    
+    Returns:
+        tuple: (transcript, detected_language)
+    """
+    logger.debug("Input language parameter: %s", language)
+    
+    # Imported here: NumPy is only needed once a recording arrives, not at boot
+    from audio_preprocess import AUDIO_PREPROCESS, preprocess_audio
+    
+    if AUDIO_PREPROCESS:
+        if isinstance(audio_data, RecordingBuffer):
+            # Preprocessing needs the whole recording
+            audio_data = await audio_data.read()
+            if audio_data is None:
+                return None, None
+        # Trim silence and downsample locally; silent recordings never reach STT
+        audio_data = preprocess_audio(audio_data)
+        if audio_data is None:
+            logger.debug("No speech in recording, skipping STT")
+            return None, None
+    
+    if language == "auto":
+        # Try multiple languages and pick best
+        with metrics.stage_timer("language_detect"):
+            transcript, detected_lang = await auto_detect_language(audio_data, api_key)
+    else:
+        # Workaround: Sarvam AI doesn't support te-IN STT, use hi-IN for Telugu
+        stt_language = "hi-IN" if language == "te-IN" else language
+        logger.debug("Using STT language: %s (requested: %s)", stt_language, language)
+        transcript = await speech_to_text(audio_data, stt_language, api_key)
+        detected_lang = language  # Keep the original language for response
+    
+    logger.debug("Detected/Selected language: %s", detected_lang)
+    logger.debug("Transcript: %s", transcript)
+    
+    return transcript, detected_lang
+
+
 async def speech_to_text(audio_data, language, api_key):
-    """Convert speech to text"""
+    """Convert speech to text (hedged: a slow request is raced by a duplicate)"""
+    return await resilience.hedged(
+        lambda: _speech_to_text_once(audio_data, language, api_key), "stt", language=language
+    )
+
+
+async def _speech_to_text_once(audio_data, language, api_key):
     try:
-        async with aiohttp.ClientSession() as session:
+        async with admission.slot("stt") as timeout:
+            session = pipeline_runtime.get_session("sarvam")
             headers = {"api-subscription-key": api_key}
             data = aiohttp.FormData()
-            data.add_field('file', audio_data, filename='audio.wav', content_type='audio/wav')
+            if isinstance(audio_data, RecordingBuffer):
+                # Upload while the recording is still downloading; every reader shares the same chunks
+                data.add_field('file', audio_data.stream(), filename='audio.wav', content_type='audio/wav')
+            else:
+                data.add_field('file', audio_data, filename='audio.wav', content_type='audio/wav')
+                metrics.observe("voice_payload_bytes", len(audio_data), payload="stt_upload")
             data.add_field('language_code', language)
             
-            print(f"[DEBUG] STT request for language: {language}")
+            logger.debug("STT request for language: %s", language)
             
-            async with session.post(
-                "https://api.sarvam.ai/speech-to-text",
-                headers=headers,
-                data=data
-            ) as response:
-                print(f"[DEBUG] STT response status: {response.status}")
-                if response.status == 200:
-                    result = await response.json()
-                    transcript = result.get('transcript', '')
-                    print(f"[DEBUG] STT transcript: {transcript}")
-                    return transcript
-                else:
-                    error_text = await response.text()
-                    print(f"[ERROR] STT failed: {response.status} - {error_text}")
+            with metrics.stage_timer("stt", language=language):
+                async with session.post(
+                    f"{SARVAM_BASE_URL}/speech-to-text",
+                    headers=headers,
+                    data=data,
+                    timeout=timeout
+                ) as response:
+                    logger.debug("STT response status: %s", response.status)
+                    metrics.inc("voice_upstream_responses_total", endpoint="stt", status=response.status)
+                    resilience.record("stt", response.status)
+                    if response.status == 200:
+                        result = await response.json()
+                        transcript = result.get('transcript', '')
+                        logger.debug("STT transcript: %s", transcript)
+                        return transcript
+                    else:
+                        error_text = await response.text()
+                        logger.error("STT failed: %s - %s", response.status, error_text)
+    except resilience.Unavailable as e:
+        metrics.inc("voice_upstream_responses_total", endpoint="stt", status=e.status)
+        logger.warning("STT skipped: %s", e)
     except Exception as e:
-        print(f"[ERROR] STT Exception: {e}")
+        resilience.record("stt")
+        metrics.inc("voice_upstream_responses_total", endpoint="stt", status="error")
+        logger.error("STT Exception: %r", e)
     return None
 
 
 async def auto_detect_language(audio_data, api_key):
-    """Auto-detect language from audio"""
+    """
+    Auto-detect language from audio
+
+    Runs STT for every candidate language concurrently and scores transcripts
+    as they arrive. A language-locked model nearly always answers in its own
+    script, so one transcript proves nothing on its own: the remaining requests
+    are cancelled only once at least two native-script candidates are in and the
+    leader clears the confidence threshold and outscores all the others by
+    AUTO_DETECT_MARGIN. Otherwise every transcript is scored as before.
+    """
+    async def _transcribe(lang_code):
+        return lang_code, await speech_to_text(audio_data, lang_code, api_key)
+    
+    tasks = [asyncio.ensure_future(_transcribe(lang_code)) for lang_code in AUTO_DETECT_LANGUAGES]
     transcripts = {}
     
-    for lang_code in ["hi-IN", "te-IN", "en-IN"]:
-        text = await speech_to_text(audio_data, lang_code, api_key)
-        if text:
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            lang_code, text = await next_done
+            if not text:
+                continue
             transcripts[lang_code] = text
+            
+            leader = clear_leader(transcripts)
+            if leader:
+                logger.debug("Early language pick: %s", leader)
+                return transcripts[leader], leader
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
     
     if not transcripts:
         return None, None
@@ -115,16 +372,11 @@ async def auto_detect_language(audio_data, api_key):
     best_lang = None
     best_score = 0
     
-    for lang_code, text in transcripts.items():
-        if lang_code == "hi-IN":
-            score = sum(1 for char in text if '\u0900' <= char <= '\u097F') * 10
-        elif lang_code == "te-IN":
-            score = sum(1 for char in text if '\u0C00' <= char <= '\u0C7F') * 10
-        elif lang_code == "en-IN":
-            # English: count Latin characters
-            score = sum(1 for char in text if 'a' <= char.lower() <= 'z')
-        else:
-            score = 0
+    for lang_code in AUTO_DETECT_LANGUAGES:
+        text = transcripts.get(lang_code)
+        if not text:
+            continue
+        score = score_transcript(text, lang_code)
         
         if score > best_score:
             best_score = score
@@ -137,123 +389,274 @@ async def auto_detect_language(audio_data, api_key):
     return transcripts.get(best_lang), best_lang
 
 
+def clear_leader(transcripts):
+    """The language that already wins auto-detection among the transcripts so far, or None"""
+    if sum(1 for lang_code in transcripts if lang_code in SCRIPT_RANGES) < 2:
+        return None
+    scores = {lang_code: score_transcript(text, lang_code) for lang_code, text in transcripts.items()}
+    leader = max(scores, key=scores.get)
+    if leader not in SCRIPT_RANGES or script_share(transcripts[leader], leader) < AUTO_DETECT_CONFIDENCE:
+        return None
+    if any(scores[leader] < AUTO_DETECT_MARGIN * score for lang_code, score in scores.items() if lang_code != leader):
+        return None
+    return leader
+
+
+def score_transcript(text, lang_code):
+    """Score a transcript for a language: native-script characters weigh 10x Latin ones"""
+    if lang_code in SCRIPT_RANGES:
+        low, high = SCRIPT_RANGES[lang_code]
+        return sum(1 for char in text if low <= char <= high) * 10
+    if lang_code == "en-IN":
+        # English: count Latin characters
+        return sum(1 for char in text if 'a' <= char.lower() <= 'z')
+    return 0
+
+
+def script_share(text, lang_code):
+    """Fraction of letters in text that belong to the language's native script"""
+    low, high = SCRIPT_RANGES[lang_code]
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return 0.0
+    return sum(1 for char in letters if low <= char <= high) / len(letters)
+
+
 async def generate_response(transcript, language, api_key):
     """Generate AI response"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with admission.slot("llm") as timeout:
+            session = pipeline_runtime.get_session("sarvam")
             headers = {
                 "api-subscription-key": api_key,
                 "Content-Type": "application/json"
             }
+            payload = build_chat_payload(transcript, language, stream=False)
             
-            # Language-specific system prompts
-            if language == "te-IN":
-                system_prompt = """మీరు హైదరాబాద్‌లో విద్యుత్ విభాగం కస్టమర్ సర్వీస్.
-సంక్షిప్తంగా సమాధానం ఇవ్వండి (400 అక్షరాలు గరిష్టం).
-సంఖ్యలను తెలుగు పదాలలో రాయండి (రెండు, మూడు).
-యూజర్ చెప్పిన ప్రాంతం పేరు మీ సమాధానంలో తప్పకుండా చెప్పండి.
-తప్పనిసరిగా తెలుగులో మాత్రమే సమాధానం ఇవ్వండి."""
-                print(f"[DEBUG] Using Telugu system prompt")
-            elif language == "en-IN":
-                system_prompt = """You are customer service for the electricity department in Hyderabad.
-Give brief answers (400 characters maximum).
-Write numbers in words (two, three).
-Mention the area name that the user told you in your response.
-Respond only in English."""
-                print(f"[DEBUG] Using English system prompt")
-            else:  # Hindi
-                system_prompt = """आप हैदराबाद में बिजली विभाग की कस्टमर सर्विस हैं।
-संक्षिप्त जवाब दें (400 अक्षर अधिकतम).
-संख्याओं को हिंदी शब्दों में लिखें (दो, तीन).
-यूजर ने जो इलाका बताया उसे अपने जवाब में ज़रूर दोहराएं."""
-                print(f"[DEBUG] Using Hindi system prompt")
-            
-            payload = {
-                "model": "sarvam-m",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": transcript}
-                ],
-                "stream": False
+            with metrics.stage_timer("llm", language=language):
+                async with session.post(
+                    f"{SARVAM_BASE_URL}/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=timeout
+                ) as response:
+                    metrics.inc("voice_upstream_responses_total", endpoint="llm", status=response.status)
+                    resilience.record("llm", response.status)
+                    if response.status == 200:
+                        result = await response.json()
+                        choice = result.get('choices', [{}])[0]
+                        content = choice.get('message', {}).get('content', '')
+                        if choice.get('finish_reason') == 'length':
+                            # Cut off by max_tokens: speak only the finished sentences
+                            content = speech_text.whole_sentences(content)
+                        return content
+    except resilience.Unavailable as e:
+        metrics.inc("voice_upstream_responses_total", endpoint="llm", status=e.status)
+        logger.warning("LLM skipped: %s", e)
+    except Exception as e:
+        resilience.record("llm")
+        metrics.inc("voice_upstream_responses_total", endpoint="llm", status="error")
+        logger.error("LLM Error: %r", e)
+    return None
+
+
+async def generate_response_stream(transcript, language, api_key, outcome=None):
+    """
+    Generate AI response as a stream of text deltas
+    
+    Consumes the chat-completions server-sent events stream. If outcome is a dict,
+    the stream's finish_reason ("stop", "length") is stored in it once it arrives.
+    """
+    try:
+        async with admission.slot("llm") as timeout:
+            session = pipeline_runtime.get_session("sarvam")
+            headers = {
+                "api-subscription-key": api_key,
+                "Content-Type": "application/json"
             }
+            payload = build_chat_payload(transcript, language, stream=True)
+            started = time.perf_counter()
+            first_delta = True
             
             async with session.post(
-                "https://api.sarvam.ai/v1/chat/completions",
+                f"{SARVAM_BASE_URL}/v1/chat/completions",
                 headers=headers,
-                json=payload
+                json=payload,
+                timeout=timeout
             ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result.get('choices', [{}])[0].get('message', {}).get('content', '')
+                metrics.inc("voice_upstream_responses_total", endpoint="llm_stream", status=response.status)
+                resilience.record("llm", response.status)
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error("LLM stream failed: %s - %s", response.status, error_text)
+                    return
+                
+                async for raw_line in response.content:
+                    line = raw_line.decode('utf-8').strip()
+                    if not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    choice = json.loads(data).get('choices', [{}])[0]
+                    if choice.get('finish_reason') and outcome is not None:
+                        outcome["finish_reason"] = choice['finish_reason']
+                    delta = choice.get('delta', {}).get('content')
+                    if delta:
+                        if first_delta:
+                            first_delta = False
+                            metrics.observe("voice_stage_seconds", time.perf_counter() - started, stage="llm_first_token", language=language)
+                        yield delta
+            metrics.observe("voice_stage_seconds", time.perf_counter() - started, stage="llm_stream", language=language)
+    except resilience.Unavailable as e:
+        metrics.inc("voice_upstream_responses_total", endpoint="llm_stream", status=e.status)
+        logger.warning("LLM stream skipped: %s", e)
     except Exception as e:
-        print(f"LLM Error: {e}")
-    return None
+        resilience.record("llm")
+        metrics.inc("voice_upstream_responses_total", endpoint="llm_stream", status="error")
+        logger.error("LLM Stream Error: %r", e)
+
+
+def build_chat_payload(transcript, language, stream=False):
+    """Build the chat-completions request with the language-specific system prompt"""
+    # Language-specific system prompts
+    if language == "te-IN":
+        system_prompt = """మీరు హైదరాబాద్‌లో విద్యుత్ విభాగం కస్టమర్ సర్వీస్.
+ఒకటి రెండు చిన్న వాక్యాల్లో సమాధానం ఇవ్వండి.
+యూజర్ చెప్పిన ప్రాంతం పేరు మీ సమాధానంలో తప్పకుండా చెప్పండి.
+తప్పనిసరిగా తెలుగులో మాత్రమే సమాధానం ఇవ్వండి."""
+        logger.debug("Using Telugu system prompt")
+    elif language == "en-IN":
+        system_prompt = """You are customer service for the electricity department in Hyderabad.
+Answer in one or two short sentences.
+Mention the area name that the user told you in your response.
+Respond only in English."""
+        logger.debug("Using English system prompt")
+    else:  # Hindi
+        system_prompt = """आप हैदराबाद में बिजली विभाग की कस्टमर सर्विस हैं।
+एक-दो छोटे वाक्यों में जवाब दें।
+यूजर ने जो इलाका बताया उसे अपने जवाब में ज़रूर दोहराएं."""
+        logger.debug("Using Hindi system prompt")
+    
+    return {
+        "model": "sarvam-m",
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": transcript}
+        ],
+        "max_tokens": LLM_MAX_TOKENS,
+        "stream": stream
+    }
+
+
+class SentenceSplitter:
+    """Incrementally split streamed text into complete sentences"""
+    
+    def __init__(self):
+        self.buffer = ""
+    
+    def feed(self, delta):
+        """Add a text delta; return the sentences it completed"""
+        self.buffer += delta
+        sentences = []
+        while True:
+            match = speech_text.SENTENCE_END_RE.search(self.buffer)
+            if not match:
+                break
+            sentence = self.buffer[:match.end()].strip()
+            self.buffer = self.buffer[match.end():]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+    
+    def flush(self):
+        """Return whatever is left once the stream has ended"""
+        sentence, self.buffer = self.buffer.strip(), ""
+        return [sentence] if sentence else []
 
 
 async def text_to_speech(text, language, api_key):
-    """Convert text to speech"""
+    """Convert text to speech (hedged: a slow request is raced by a duplicate)"""
+    return await resilience.hedged(
+        lambda: _text_to_speech_once(text, language, api_key), "tts", language=language
+    )
+
+
+async def _text_to_speech_once(text, language, api_key):
+    # Concurrent requests with the same voice settings share one HTTP request
+    return await tts_batcher.submit((api_key, language, TTS_SPEAKER, TTS_MODEL), text)
+
+
+async def synthesize_batch(settings, texts):
+    """
+    One Sarvam TTS request for several texts
+    
+    Returns:
+        list: audio bytes (or None) per text, in order
+    """
+    api_key, language, speaker, model = settings
     try:
-        async with aiohttp.ClientSession() as session:
+        async with admission.slot("tts") as timeout:
+            session = pipeline_runtime.get_session("sarvam")
             headers = {
                 "api-subscription-key": api_key,
                 "Content-Type": "application/json"
             }
             
-            print(f"[DEBUG] TTS request for language: {language}")
+            logger.debug("TTS request for language: %s (%s texts)", language, len(texts))
             
             payload = {
-                "inputs": [text],
+                "inputs": texts,
                 "target_language_code": language,
-                "speaker": "anushka",
+                "speaker": speaker,
                 "pitch": 0,
                 "pace": 1.0,
                 "loudness": 1.5,
                 "speech_sample_rate": 8000,  # Twilio uses 8kHz
                 "enable_preprocessing": True,
-                "model": "bulbul:v2"
+                "model": model
             }
             
-            async with session.post(
-                "https://api.sarvam.ai/text-to-speech",
-                headers=headers,
-                json=payload
-            ) as response:
-                print(f"[DEBUG] TTS response status: {response.status}")
-                if response.status == 200:
-                    result = await response.json()
-                    audio_base64 = result.get('audios', [''])[0]
-                    if audio_base64:
-                        return base64.b64decode(audio_base64)
-                else:
-                    error_text = await response.text()
-                    print(f"[ERROR] TTS failed: {response.status} - {error_text}")
+            with metrics.stage_timer("tts", language=language):
+                async with session.post(
+                    f"{SARVAM_BASE_URL}/text-to-speech",
+                    headers=headers,
+                    json=payload,
+                    timeout=timeout
+                ) as response:
+                    logger.debug("TTS response status: %s", response.status)
+                    metrics.inc("voice_upstream_responses_total", endpoint="tts", status=response.status)
+                    resilience.record("tts", response.status)
+                    if response.status == 200:
+                        result = await response.json()
+                        audios = []
+                        for audio_base64 in result.get('audios', []):
+                            audio = base64.b64decode(audio_base64) if audio_base64 else None
+                            if audio:
+                                metrics.observe("voice_payload_bytes", len(audio), payload="tts_audio")
+                            audios.append(audio)
+                        return audios
+                    else:
+                        error_text = await response.text()
+                        logger.error("TTS failed: %s - %s", response.status, error_text)
+    except resilience.Unavailable as e:
+        metrics.inc("voice_upstream_responses_total", endpoint="tts", status=e.status)
+        logger.warning("TTS skipped: %s", e)
     except Exception as e:
-        print(f"[ERROR] TTS Exception: {e}")
-    return None
+        resilience.record("tts")
+        metrics.inc("voice_upstream_responses_total", endpoint="tts", status="error")
+        logger.error("TTS Exception: %r", e)
+    return [None] * len(texts)
+
+
+tts_batcher = MicroBatcher(synthesize_batch)
 
 
 def apply_corrections(text, language):
     """Apply language-specific corrections"""
-    corrections = {
-        "jivpatamgudi": "మెహెందిపట్నం" if language == "te-IN" else "मेहंदीपटनम",
-        "jivpatam gudi": "మెహెందిపట్నం" if language == "te-IN" else "मेहंदीपटनम",
-        "लाइट": "लाइट (बिजली)",
-        "light": "లైట్ (విద్యుత్)" if language == "te-IN" else "लाइट (बिजली)",
-        "करंट": "करंट (बिजली)",
-        "current": "కరెంట్ (విద్యుత్)" if language == "te-IN" else "करंट (बिजली)",
-    }
-    
-    for wrong, right in corrections.items():
-        text = text.replace(wrong, right)
-    
-    return text
+    return corrections.apply("stt", text, language)
 
 
 def apply_tts_corrections(text, language):
-    """Apply pronunciation corrections for TTS"""
-    if language == "te-IN":
-        text = text.replace("మెహెందిపట్నం", "మెహెంది పట్నం")
-    else:  # Hindi
-        text = text.replace("मेहंदीपटनम", "मेहंदी पटनम")
-    
-    return text
+    """Spell out numbers, times and units, then apply pronunciation corrections for TTS"""
+    return corrections.apply("tts", speech_text.normalize(text, language), language)